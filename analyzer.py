@@ -0,0 +1,144 @@
+"""
+Symbol Analyzer Module
+
+此模組集中儀表板與各分析頁面共用的分析邏輯，主要功能包括：
+- 記憶體成本權重與符號成本計算
+- 全域篩選條件套用
+- 異常檢測規則定義與執行
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import pandas as pd
+
+# 記憶體區域成本權重（未列出的區域權重為 1）
+MEMORY_COST_WEIGHTS = {
+    "ilm": 10, "dlm": 10,
+    "sysram": 9,
+    "ext_memory1": 2, "ext_memory2": 2
+}
+
+# 全域篩選條件名稱與欄位對應
+FILTER_COLUMNS = {
+    "memory": "symbol_physical_memory",
+    "module": "symbol_module",
+    "folder": "symbol_folder_name_for_file",
+    "file": "symbol_filename",
+    "section": "input_section",
+    "realtime": "symbol_realtime",
+    "hw_usage": "symbol_hw_usage",
+    "image": "symbol_image"
+}
+
+def add_symbol_cost(df):
+    """
+    計算並加入 symbol_cost 欄位。
+
+    Args:
+        df (pd.DataFrame): 含 symbol_size 與 symbol_physical_memory 的資料
+
+    Returns:
+        pd.DataFrame: 加入 symbol_cost 欄位後的同一個 DataFrame
+
+    備註:
+        - 成本計算公式: symbol_size * memory_weight
+    """
+    weights = df["symbol_physical_memory"].map(MEMORY_COST_WEIGHTS).astype(float).fillna(1)
+    df["symbol_cost"] = df["symbol_size"] * weights
+    return df
+
+def apply_filters(df, filters):
+    """
+    套用篩選條件到DataFrame。
+
+    Args:
+        df (pd.DataFrame): 原始資料框架
+        filters (dict): 篩選條件字典，格式為 {column_name: filter_values}
+
+    Returns:
+        pd.DataFrame: 篩選後的資料框架
+    """
+    return df[filter_mask(df, filters)].copy()
+
+def filter_mask(df, filters):
+    """
+    計算符合篩選條件的列。
+
+    Args:
+        df (pd.DataFrame): 原始資料框架
+        filters (dict): 篩選條件字典，格式為 {column_name: filter_values}
+
+    Returns:
+        pd.Series: 布林遮罩，符合所有篩選條件的列為 True
+    """
+    mask = pd.Series(True, index=df.index)
+    for column, values in (filters or {}).items():
+        if values:
+            mask &= df[column].isin(values)
+    return mask
+
+def filter_spec(conditions):
+    """
+    將以篩選名稱為鍵的條件轉為以欄位名稱為鍵的篩選字典。
+
+    Args:
+        conditions (dict): 格式為 {'memory': [...], 'module': [...], ...}
+
+    Returns:
+        dict: 可直接傳給 apply_filters 的 {column_name: filter_values}
+    """
+    return {FILTER_COLUMNS[name]: values for name, values in conditions.items() if name in FILTER_COLUMNS}
+
+def _in_ext_memory(df):
+    return df["symbol_physical_memory"].str.contains("ext")
+
+# 規則 1: High realtime in ext_memory
+def rule_high_realtime_in_ext(df):
+    return (df["symbol_realtime"] == "High") & _in_ext_memory(df)
+
+# 規則 2: Low realtime in high-cost memory
+def rule_low_realtime_in_fast(df):
+    return (df["symbol_realtime"] == "Low") & df["symbol_physical_memory"].isin(["ilm", "dlm", "sysram"])
+
+# 規則 3: hw_usage = Yes 放入 ext memory
+def rule_hw_usage_in_ext(df):
+    return (df["symbol_hw_usage"] == "Yes") & _in_ext_memory(df)
+
+# 規則 4: symbol_realtime 與 symbol_access_count 不一致
+def rule_realtime_access_mismatch(df):
+    high_mismatch = (df["symbol_realtime"] == "High") & (df["symbol_access_count"] < 33)
+    low_mismatch = (df["symbol_realtime"] == "Low") & (df["symbol_access_count"] > 66)
+    return high_mismatch | low_mismatch
+
+# 異常檢測規則清單: (標題, 規則函式, 日誌訊息)
+VIOLATION_RULES = [
+    ("High Realtime 符號放入低速記憶體", rule_high_realtime_in_ext,
+     "發現 {count} 個 High Realtime 符號在低速記憶體中"),
+    ("Low Realtime 符號放入高速記憶體", rule_low_realtime_in_fast,
+     "發現 {count} 個 Low Realtime 符號在高速記憶體中"),
+    ("HW Usage 符號放入外部記憶體", rule_hw_usage_in_ext,
+     "發現 {count} 個 HW Usage 符號在外部記憶體中"),
+    ("Realtime 等級與存取次數不一致", rule_realtime_access_mismatch,
+     "發現 {count} 個 Realtime 等級與存取次數不一致的符號"),
+]
+
+def detect_violations(df, logger=None):
+    """
+    依序執行所有異常檢測規則。
+
+    Args:
+        df (pd.DataFrame): 要檢查的符號資料
+        logger (logging.Logger, optional): 若提供，則記錄每條規則的違規數量
+
+    Returns:
+        list: [(規則標題, 違規資料 DataFrame), ...]，僅包含有違規的規則
+    """
+    violations = []
+    for title, rule, message in VIOLATION_RULES:
+        df_ = df[rule(df)]
+        if not df_.empty:
+            if logger is not None:
+                logger.warning(message.format(count=len(df_)))
+            violations.append((title, df_))
+    return violations
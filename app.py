@@ -19,7 +19,28 @@ import pandas as pd
 import plotly.express as px
 import os
 import logging
+from functools import partial
 from data_generation import generate_symbol_data
+from analyzer import add_symbol_cost, apply_filters, filter_spec, VIOLATION_RULES
+from sampling import DEFAULT_STRATA, build_stratified_sample, estimate_total, estimate_violation_counts
+from sharded import ShardedTable
+from report_jobs import ReportJobs, dataset_fingerprint, report_cache_key
+from access_trace import TRACE_FORMATS, update_symbol_file
+from build_watcher import WATCH_DIR, CATALOG_PATH, ROLLUP_PATH, latest_build, load_catalog, start_background_watcher
+from workspace import (WORKSPACE_DIR, IMAGE_COLUMN, discover_images, workspace_mtime, load_workspace,
+                       load_region_config, region_utilization)
+
+# 預設資料檔案路徑
+DATA_PATH = "data/symbols.csv"
+
+# 追蹤最新 CI 建置時的自動檢查間隔（秒）
+AUTO_REFRESH_SECONDS = 10
+
+# 資料筆數達此門檻時，預設開啟快速預覽模式
+PREVIEW_DEFAULT_ROWS = 200000
+
+# 同時保留的資料集數量（symbols.csv、最新 CI 建置、多映像工作區各一份，另留一份給更新中的資料）
+MAX_LOADED_DATASETS = 4
 
 # logging 設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -87,11 +108,15 @@ if st.button("產生測試資料"):
     st.write("您可以使用左側選單進行更深入的分析。")
 
 # 載入資料
-@st.cache_data
-def load_data():
+@st.cache_resource(max_entries=MAX_LOADED_DATASETS)
+def load_data(path=DATA_PATH, mtime=None):
     """
     載入並處理符號資料。
 
+    Args:
+        path (str, optional): 符號資料 CSV 路徑，或多映像工作區資料夾. 預設為"data/symbols.csv".
+        mtime (float, optional): 檔案修改時間，僅作為快取鍵
+
     Returns:
         pd.DataFrame: 包含以下欄位的DataFrame：
             - symbol_name: 符號名稱
@@ -101,59 +126,222 @@ def load_data():
             - symbol_cost: 計算後的成本
             
     備註:
-        - 若檔案不存在則回傳空的DataFrame
+        - 若檔案不存在則回傳空的DataFrame；檔案無法載入時拋出例外（不會被快取）
+        - 路徑為資料夾時，以 workspace.load_workspace 載入其中所有映像並加入 symbol_image 欄位
+        - 以 cache_resource 保存，重新執行時不複製整份資料；呼叫端不可就地修改回傳的 DataFrame
         - 成本計算公式: symbol_size * memory_weight
         - 記憶體權重: ilm=10, dlm=10, sysram=8, ext_memory=2
     """
-    path = "data/symbols.csv"
     logger.info(f"嘗試載入資料: {path}")
     if not os.path.exists(path):
         logger.warning(f"找不到資料檔案: {path}")
         return pd.DataFrame()
     try:
-        df = pd.read_csv(path)
+        df = load_workspace(discover_images(path)) if os.path.isdir(path) else pd.read_csv(path)
         logger.info(f"成功載入資料，共 {len(df)} 筆記錄")
-        df["symbol_cost"] = df["symbol_size"] * df["symbol_physical_memory"].map({
-            "ilm": 10, "dlm": 10, "sysram": 9, "ext_memory1": 2, "ext_memory2": 2
-        }).fillna(1)
-        return df
+        return add_symbol_cost(df)
     except Exception as e:
         logger.error(f"載入資料時發生錯誤: {str(e)}")
-        return pd.DataFrame()
+        raise
+
+@st.cache_data
+def load_sample(path=DATA_PATH, mtime=None):
+    """
+    載入資料時一併建立快速預覽用的分層樣本。
+
+    Args:
+        path (str, optional): 符號資料 CSV 路徑. 預設為"data/symbols.csv".
+        mtime (float, optional): 檔案修改時間，僅作為快取鍵
+
+    Returns:
+        pd.DataFrame: 依記憶體區域與模組（多映像工作區另加映像）分層的樣本（見 sampling.build_stratified_sample）
+    """
+    df = load_data(path, mtime)
+    # 多映像工作區另依映像分層；層數再多樣本大小仍固定為預設值
+    strata = DEFAULT_STRATA + [IMAGE_COLUMN] if IMAGE_COLUMN in df.columns else DEFAULT_STRATA
+    sample = build_stratified_sample(df, strata)
+    logger.info(f"建立分層樣本，共 {len(sample)} 筆記錄")
+    return sample
+
+@st.cache_data
+def load_filter_options(path, mtime):
+    """
+    取得全域篩選器的選項，避免每次重新執行都掃描整份資料。
+
+    Args:
+        path (str): 符號資料 CSV 路徑或多映像工作區資料夾
+        mtime (float): 檔案修改時間，僅作為快取鍵
+
+    Returns:
+        dict: {篩選名稱: 排序後的選項列表}
+    """
+    df = load_data(path, mtime)
+    return {
+        "memory": sorted(df["symbol_physical_memory"].unique()),
+        "module": sorted(df["symbol_module"].unique()),
+        "folder": sorted(df["symbol_folder_name_for_file"].unique()),
+        "file": sorted(df["symbol_filename"].unique()),
+        "section": sorted(df["input_section"].unique()),
+        "realtime": ["High", "Medium", "Low"],
+        "hw_usage": ["Yes", "No"],
+        "image": sorted(df[IMAGE_COLUMN].unique()) if IMAGE_COLUMN in df.columns else []
+    }
+
+def estimate_error_bars(estimate):
+    """
+    將估計結果轉為 plotly 誤差線所需的欄位。
+
+    Args:
+        estimate (pd.DataFrame): sampling.estimate_total 的回傳值
 
-def apply_filters(df, filters):
+    Returns:
+        pd.DataFrame: 加入 error_plus / error_minus 欄位並重設索引的 DataFrame
+    """
+    estimate = estimate.assign(
+        error_plus=estimate["upper"] - estimate["estimate"],
+        error_minus=estimate["estimate"] - estimate["lower"]
+    )
+    return estimate.reset_index()
+
+@st.cache_resource(max_entries=MAX_LOADED_DATASETS)
+def load_sharded_table(path, mtime):
     """
-    套用篩選條件到DataFrame。
+    將符號資料放入共享記憶體，供多程序篩選、規則檢測與分組加總使用。
 
     Args:
-        df (pd.DataFrame): 原始資料框架
-        filters (dict): 篩選條件字典，格式為 {column_name: filter_values}
+        path (str): 符號資料 CSV 路徑或多映像工作區資料夾
+        mtime (float): 檔案修改時間，僅作為快取鍵
 
     Returns:
-        pd.DataFrame: 篩選後的資料框架
+        ShardedTable: 欄式共享記憶體資料（資料量小時在目前程序中計算）
+
+    備註:
+        - 依 (path, mtime) 快取，不同資料來源的 session 各自沿用自己的資料表，
+          不會互相淘汰而重複複製資料
+        - 所有資料表共用同一個程序池；被淘汰的資料表不主動關閉，
+          等所有 session 不再引用（session_state['sharded_table']）後才釋放共享記憶體
+    """
+    table = ShardedTable(load_data(path, mtime))
+    logger.info(f"建立欄式資料表，共 {table.n_rows} 筆記錄，多程序: {table.parallel}")
+    return table
+
+@st.cache_resource
+def ensure_build_watcher():
     """
-    df_filtered = df.copy()
-    for column, values in filters.items():
-        if values:
-            df_filtered = df_filtered[df_filtered[column].isin(values)]
-    return df_filtered
+    在伺服器程序中只啟動一次 CI 監看資料夾的背景執行緒。
 
-symbol_df = load_data()
+    Returns:
+        threading.Event: 背景監看的停止事件
+    """
+    logger.info(f"啟動背景監看: {WATCH_DIR}")
+    return start_background_watcher()
+
+@st.cache_data
+def load_build_history(catalog_mtime):
+    """
+    載入建置目錄與各建置的記憶體區域用量。
+
+    Args:
+        catalog_mtime (float): 建置目錄的修改時間，僅作為快取鍵
+
+    Returns:
+        tuple: (建置目錄 DataFrame, 各建置 × 記憶體區域總大小 DataFrame)
+    """
+    catalog = load_catalog()
+    if catalog.empty or not os.path.exists(ROLLUP_PATH):
+        return catalog, pd.DataFrame()
+    rollups = pd.read_csv(ROLLUP_PATH)
+    region_size = rollups.groupby(["build_id", "symbol_physical_memory"], sort=False)["total_size"].sum().reset_index()
+    return catalog, region_size
+
+def check_latest_build():
+    """
+    若有比目前畫面更新的 CI 建置，重新執行整個頁面。
+    """
+    build = latest_build()
+    if build is not None and build["build_id"] != st.session_state.get("loaded_build_id"):
+        logger.info(f"偵測到新的建置 {build['build_id']}，重新整理頁面")
+        st.rerun()
+
+# 支援 fragment 的 Streamlit 版本可定時自動檢查，否則由使用者手動檢查
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+if _fragment is not None:
+    check_latest_build = _fragment(run_every=AUTO_REFRESH_SECONDS)(check_latest_build)
+
+# 資料來源：手動上傳的 symbols.csv、CI 監看資料夾中最新的建置，或多映像工作區
+data_path = DATA_PATH
+data_sources = ["symbols.csv"]
+build = None
+if os.path.isdir(WATCH_DIR):
+    ensure_build_watcher()
+    build = latest_build()
+    if build is not None:
+        data_sources.append("最新 CI 建置")
+if discover_images(WORKSPACE_DIR):
+    data_sources.append("多映像工作區")
+data_source = st.sidebar.radio("資料來源", data_sources, key="data_source") if len(data_sources) > 1 else data_sources[0]
+
+if data_source == "多映像工作區":
+    data_path = WORKSPACE_DIR
+    st.sidebar.caption(f"映像: {', '.join(discover_images(WORKSPACE_DIR))}")
+
+if build is not None:
+    if data_source == "最新 CI 建置":
+        data_path = build["path"]
+        st.session_state["loaded_build_id"] = build["build_id"]
+        st.sidebar.caption(f"建置 {build['build_id']}（匯入於 {build['ingested_at']}）")
+        with st.sidebar:
+            if _fragment is not None:
+                check_latest_build()
+            elif st.button("檢查最新建置"):
+                check_latest_build()
+
+    with st.expander("CI 建置紀錄"):
+        catalog, region_size = load_build_history(os.path.getmtime(CATALOG_PATH))
+        st.dataframe(catalog, use_container_width=True)
+        if not region_size.empty:
+            fig_builds = px.line(region_size, x="build_id", y="total_size",
+                                 color="symbol_physical_memory", markers=True,
+                                 title="各建置記憶體區域用量",
+                                 labels={"build_id": "建置", "total_size": "總大小 (bytes)"})
+            st.plotly_chart(fig_builds, use_container_width=True)
+
+data_mtime = workspace_mtime(data_path) if os.path.exists(data_path) else None
+try:
+    symbol_df = load_data(data_path, data_mtime)
+except Exception as e:
+    st.error(f"載入資料失敗: {str(e)}")
+    st.stop()
 if symbol_df.empty:
     st.warning("請先上傳或產生測試資料 symbols.csv")
     st.stop()
 
+# 匯入執行期存取追蹤，以實際命中次數的百分位等級取代 symbol_access_count
+# 只更新使用者自己的 symbols.csv；CI 建置與多映像工作區為唯讀資料來源
+if data_path == DATA_PATH:
+    with st.sidebar.expander("匯入存取追蹤"):
+        if 'trace_message' in st.session_state:
+            st.success(st.session_state.pop('trace_message'))
+        trace_file = st.file_uploader("追蹤檔案（PC 取樣 / 匯流排追蹤）", key="trace_file")
+        trace_format = st.selectbox("格式", options=list(TRACE_FORMATS), key="trace_format")
+        if trace_file is not None and st.button("更新存取次數", key="apply_trace"):
+            try:
+                source = trace_file if trace_format == "text" else trace_file.getvalue()
+                stats = update_symbol_file(data_path, source, trace_format)
+                logger.info(f"使用者匯入存取追蹤: {trace_file.name}，{stats}")
+                st.session_state['trace_message'] = (
+                    f"已更新 {data_path}：{stats['total_samples']:,} 筆取樣，"
+                    f"命中符號 {stats['matched_samples']:,} 筆"
+                )
+                st.cache_data.clear()
+                st.rerun()
+            except Exception as e:
+                logger.error(f"存取追蹤匯入失敗: {str(e)}")
+                st.error("存取追蹤匯入失敗，請確認檔案格式是否正確")
+
 # 將篩選功能移到頂部
 st.subheader("全域篩選")
-filters = {
-    "memory": sorted(symbol_df["symbol_physical_memory"].unique()),
-    "module": sorted(symbol_df["symbol_module"].unique()),
-    "folder": sorted(symbol_df["symbol_folder_name_for_file"].unique()),
-    "file": sorted(symbol_df["symbol_filename"].unique()),
-    "section": sorted(symbol_df["input_section"].unique()),
-    "realtime": ["High", "Medium", "Low"],
-    "hw_usage": ["Yes", "No"]
-}
+filters = load_filter_options(data_path, data_mtime)
 
 # 全域篩選器
 col1, col2, col3 = st.columns(3)
@@ -167,45 +355,37 @@ with col2:
 with col3:
     realtime_filter = st.multiselect("即時性需求", options=filters["realtime"], default=[], key="global_realtime")
     hw_usage_filter = st.multiselect("硬體使用", options=filters["hw_usage"], default=[], key="global_hw_usage")
+    image_filter = st.multiselect("映像", options=filters["image"], default=[], key="global_image") if filters["image"] else []
 
-# 套用篩選條件
-df_filtered = symbol_df.copy()
-if memory_filter:
-    df_filtered = df_filtered[df_filtered["symbol_physical_memory"].isin(memory_filter)]
-if module_filter:
-    df_filtered = df_filtered[df_filtered["symbol_module"].isin(module_filter)]
-if folder_filter:
-    df_filtered = df_filtered[df_filtered["symbol_folder_name_for_file"].isin(folder_filter)]
-if file_filter:
-    df_filtered = df_filtered[df_filtered["symbol_filename"].isin(file_filter)]
-if section_filter:
-    df_filtered = df_filtered[df_filtered["input_section"].isin(section_filter)]
-if realtime_filter:
-    df_filtered = df_filtered[df_filtered["symbol_realtime"].isin(realtime_filter)]
-if hw_usage_filter:
-    df_filtered = df_filtered[df_filtered["symbol_hw_usage"].isin(hw_usage_filter)]
-
-# 將篩選後的資料存入 session state
-st.session_state['filtered_data'] = df_filtered
-st.session_state['filter_conditions'] = {
+# 篩選條件
+filter_conditions = {
     'memory': memory_filter,
     'module': module_filter,
     'folder': folder_filter,
     'file': file_filter,
     'section': section_filter,
     'realtime': realtime_filter,
-    'hw_usage': hw_usage_filter
+    'hw_usage': hw_usage_filter,
+    'image': image_filter
 }
 
+# 快速預覽模式：先以分層樣本估計，精確結果完成後再取代
+preview_mode = st.sidebar.checkbox(
+    "快速預覽（抽樣估計）",
+    value=len(symbol_df) >= PREVIEW_DEFAULT_ROWS,
+    key="preview_mode",
+    help="先以載入時建立的分層樣本顯示估計值與 95% 信賴區間，精確結果計算完成後自動取代"
+)
+
 # 顯示篩選結果統計
-st.info(f"篩選後資料筆數: {len(df_filtered)} / 總筆數: {len(symbol_df)}")
+summary_slot = st.empty()
 
 # 使用 tabs 來組織圖表和篩選器
 tab1, tab2, tab3, tab4 = st.tabs([
     "成本分析", "記憶體分布", "異常分析", "詳細資料"
 ])
 
-# Tab 1: 成本分析
+# Tab 1: 成本分析（圖表先以 placeholder 佔位）
 with tab1:
     col1, col2 = st.columns([3, 1])
     with col2:
@@ -217,26 +397,112 @@ with tab1:
     with col1:
         # 成本最多模組排行
         st.subheader("成本最高模組排行 (Top 10)")
-        mod_rank = df_filtered.groupby("symbol_module")["symbol_cost"].sum().nlargest(10).reset_index()
-        fig_mod = px.bar(mod_rank, x="symbol_module", y="symbol_cost", text_auto=True)
-        st.plotly_chart(fig_mod, use_container_width=True)
+        mod_rank_slot = st.empty()
 
         # 圓餅圖（記憶體使用成本佔比）
         st.subheader("記憶體區域成本佔比")
-        mem_cost = df_filtered.groupby("symbol_physical_memory")["symbol_cost"].sum().reset_index()
-        fig_pie = px.pie(mem_cost, names="symbol_physical_memory", values="symbol_cost", title="Memory Usage Share")
-        st.plotly_chart(fig_pie, use_container_width=True)
+        mem_cost_slot = st.empty()
 
         # 資料夾成本分析
         st.subheader("資料夾成本分析")
-        folder_cost = df_filtered.groupby("symbol_folder_name_for_file")["symbol_cost"].sum().sort_values(ascending=False)
-        fig_folder = px.bar(folder_cost.reset_index(), 
-                           x="symbol_folder_name_for_file", 
-                           y="symbol_cost",
-                           title="各資料夾成本分布",
-                           labels={"symbol_folder_name_for_file": "資料夾", "symbol_cost": "成本"})
-        fig_folder.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig_folder, use_container_width=True)
+        folder_cost_slot = st.empty()
+
+# Tab 3: 異常分析（違規筆數先以 placeholder 佔位）
+with tab3:
+    tab3_col1, tab3_col2 = st.columns([3, 1])
+    with tab3_col2:
+        st.subheader("異常分析篩選")
+        realtime_filter_t3 = st.multiselect("即時性需求", options=filters["realtime"], default=[], key="tab3_realtime")
+        hw_usage_filter_t3 = st.multiselect("硬體使用", options=filters["hw_usage"], default=[], key="tab3_hw_usage")
+    with tab3_col1:
+        st.subheader("各規則違規筆數")
+        violation_count_slot = st.empty()
+
+# 預覽：以分層樣本估計
+if preview_mode:
+    sample_filtered = apply_filters(load_sample(data_path, data_mtime), filter_spec(filter_conditions))
+
+    count_est = estimate_total(sample_filtered)
+    if count_est.empty:
+        summary_slot.info(f"（預覽）篩選後資料筆數 ≈ 0 / 總筆數: {len(symbol_df)}")
+    else:
+        row = count_est.iloc[0]
+        summary_slot.info(
+            f"（預覽）篩選後資料筆數 ≈ {row['estimate']:,.0f} "
+            f"(95% CI: {row['lower']:,.0f} – {row['upper']:,.0f}) / 總筆數: {len(symbol_df)}"
+        )
+
+    mod_est = estimate_total(sample_filtered, "symbol_cost", by="symbol_module").nlargest(10, "estimate")
+    fig_mod = px.bar(estimate_error_bars(mod_est), x="symbol_module", y="estimate",
+                     error_y="error_plus", error_y_minus="error_minus",
+                     title="預覽：抽樣估計（95% 信賴區間）",
+                     labels={"estimate": "symbol_cost (估計)"})
+    mod_rank_slot.plotly_chart(fig_mod, use_container_width=True)
+
+    mem_est = estimate_error_bars(estimate_total(sample_filtered, "symbol_cost", by="symbol_physical_memory"))
+    fig_pie = px.pie(mem_est, names="symbol_physical_memory", values="estimate",
+                     hover_data={"lower": ":,.0f", "upper": ":,.0f"},
+                     title="Memory Usage Share（預覽：抽樣估計）")
+    mem_cost_slot.plotly_chart(fig_pie, use_container_width=True)
+
+    folder_est = estimate_total(sample_filtered, "symbol_cost", by="symbol_folder_name_for_file")
+    fig_folder = px.bar(estimate_error_bars(folder_est.sort_values("estimate", ascending=False)),
+                        x="symbol_folder_name_for_file", y="estimate",
+                        error_y="error_plus", error_y_minus="error_minus",
+                        title="各資料夾成本分布（預覽：抽樣估計，95% 信賴區間）",
+                        labels={"symbol_folder_name_for_file": "資料夾", "estimate": "成本 (估計)"})
+    fig_folder.update_layout(xaxis_tickangle=-45)
+    folder_cost_slot.plotly_chart(fig_folder, use_container_width=True)
+
+    violation_est = estimate_violation_counts(sample_filtered)
+    with violation_count_slot.container():
+        st.caption("預覽：抽樣估計（95% 信賴區間），精確結果計算中...")
+        for col, (title, row) in zip(st.columns(len(violation_est)), violation_est.iterrows()):
+            col.metric(title, f"≈ {row['estimate']:,.0f}")
+            col.caption(f"{row['lower']:,.0f} – {row['upper']:,.0f}")
+
+# 套用篩選條件（精確結果）：篩選在工作程序中計算，只在需要資料表時才取出篩選後的資料
+column_filters = filter_spec(filter_conditions)
+sharded_table = load_sharded_table(data_path, data_mtime)
+
+# 將篩選條件與資料表存入 session state，子頁面自行取出所需的結果
+st.session_state['filter_conditions'] = filter_conditions
+st.session_state['sharded_table'] = sharded_table
+
+# 顯示篩選結果統計
+summary_slot.info(f"篩選後資料筆數: {sharded_table.count(column_filters)} / 總筆數: {len(symbol_df)}")
+
+# Tab 1: 以精確結果取代預覽（多映像工作區另依映像分組並以顏色區分）
+multi_image = IMAGE_COLUMN in symbol_df.columns
+image_keys = [IMAGE_COLUMN] if multi_image else []
+image_color = IMAGE_COLUMN if multi_image else None
+
+mod_cost = sharded_table.group_sum(["symbol_module"] + image_keys, filters=column_filters)["symbol_cost"]
+top_modules = list(mod_cost.groupby(level="symbol_module").sum().nlargest(10).index)
+mod_rank = mod_cost[mod_cost.index.get_level_values("symbol_module").isin(top_modules)].reset_index()
+fig_mod = px.bar(mod_rank, x="symbol_module", y="symbol_cost", color=image_color, text_auto=True,
+                 category_orders={"symbol_module": top_modules}, labels={IMAGE_COLUMN: "映像"})
+mod_rank_slot.plotly_chart(fig_mod, use_container_width=True)
+
+mem_cost = sharded_table.group_sum(["symbol_physical_memory"] + image_keys, filters=column_filters)["symbol_cost"].reset_index()
+if multi_image:
+    fig_pie = px.sunburst(mem_cost, path=["symbol_physical_memory", IMAGE_COLUMN], values="symbol_cost",
+                          title="Memory Usage Share（記憶體區域 → 映像）")
+else:
+    fig_pie = px.pie(mem_cost, names="symbol_physical_memory", values="symbol_cost", title="Memory Usage Share")
+mem_cost_slot.plotly_chart(fig_pie, use_container_width=True)
+
+folder_cost = sharded_table.group_sum(["symbol_folder_name_for_file"] + image_keys, filters=column_filters)["symbol_cost"]
+folder_order = list(folder_cost.groupby(level="symbol_folder_name_for_file").sum().sort_values(ascending=False).index)
+fig_folder = px.bar(folder_cost.reset_index(), 
+                   x="symbol_folder_name_for_file", 
+                   y="symbol_cost",
+                   color=image_color,
+                   category_orders={"symbol_folder_name_for_file": folder_order},
+                   title="各資料夾成本分布",
+                   labels={"symbol_folder_name_for_file": "資料夾", "symbol_cost": "成本", IMAGE_COLUMN: "映像"})
+fig_folder.update_layout(xaxis_tickangle=-45)
+folder_cost_slot.plotly_chart(fig_folder, use_container_width=True)
 
 # Tab 2: 記憶體分布
 with tab2:
@@ -249,12 +515,16 @@ with tab2:
 
     with col1:
         st.subheader("記憶體分布 Treemap")
-        module_sizes = (df_filtered.groupby("symbol_module")["symbol_size"].sum() / 1024).to_dict()
-        df_filtered["module_total_size"] = df_filtered["symbol_module"].map(module_sizes)
+        module_sizes = (sharded_table.group_sum("symbol_module", ("symbol_size",), column_filters)["symbol_size"] / 1024).to_dict()
+        df_filtered = sharded_table.filtered_frame(column_filters)
+        # 多映像工作區在記憶體區域下再依映像分層
+        tree_path = ["symbol_physical_memory", "symbol_module", "symbol_name"]
+        if IMAGE_COLUMN in df_filtered.columns:
+            tree_path.insert(1, IMAGE_COLUMN)
 
         fig_tree = px.treemap(
-            df_filtered,
-            path=["symbol_physical_memory", "symbol_module", "symbol_name"],
+            df_filtered.assign(module_total_size=df_filtered["symbol_module"].map(module_sizes)),
+            path=tree_path,
             values="symbol_size",  # 改用 symbol_size 作為區塊大小
             color="symbol_cost",   # 保留 cost 作為顏色區分
             color_continuous_scale="RdBu",
@@ -280,65 +550,78 @@ with tab2:
 
         st.plotly_chart(fig_tree, use_container_width=True)
 
-# Tab 3: 異常分析
-with tab3:
-    col1, col2 = st.columns([3, 1])
-    with col2:
-        st.subheader("異常分析篩選")
-        realtime_filter_t3 = st.multiselect("即時性需求", options=filters["realtime"], default=[], key="tab3_realtime")
-        hw_usage_filter_t3 = st.multiselect("硬體使用", options=filters["hw_usage"], default=[], key="tab3_hw_usage")
+        # 多映像工作區：共用區域看所有映像的合計壓力，私有區域看各映像各自的使用率
+        if multi_image:
+            st.subheader("記憶體區域使用率（各映像）")
+            # 共用區域的合計使用量必須包含所有映像，因此不套用映像篩選；私有區域與明細只顯示選取的映像
+            usage_filters = {column: values for column, values in column_filters.items() if column != IMAGE_COLUMN}
+            usage = sharded_table.group_sum([IMAGE_COLUMN, "symbol_physical_memory"], ("symbol_size",), usage_filters)
+            utilization = region_utilization(usage["symbol_size"], load_region_config(WORKSPACE_DIR))
+            utilization["image_share"] = utilization["used"] / utilization["capacity"]
+            if image_filter:
+                selected_images = utilization[IMAGE_COLUMN].isin(image_filter)
+            else:
+                selected_images = pd.Series(True, index=utilization.index)
+
+            shared_usage = utilization[utilization["shared"]]
+            if not shared_usage.empty:
+                fig_shared = px.bar(shared_usage, x="symbol_physical_memory", y="image_share", color=IMAGE_COLUMN,
+                                    title="共用區域使用率（各映像合計）",
+                                    labels={"symbol_physical_memory": "記憶體區域", "image_share": "使用率",
+                                            IMAGE_COLUMN: "映像"})
+                fig_shared.add_hline(y=1, line_dash="dash", line_color="red")
+                fig_shared.update_layout(yaxis_tickformat=".0%")
+                st.plotly_chart(fig_shared, use_container_width=True)
+
+            private_usage = utilization[~utilization["shared"] & selected_images]
+            if not private_usage.empty:
+                fig_private = px.bar(private_usage, x="symbol_physical_memory", y="utilization", color=IMAGE_COLUMN,
+                                     barmode="group", title="私有區域使用率（各映像）",
+                                     labels={"symbol_physical_memory": "記憶體區域", "utilization": "使用率",
+                                             IMAGE_COLUMN: "映像"})
+                fig_private.add_hline(y=1, line_dash="dash", line_color="red")
+                fig_private.update_layout(yaxis_tickformat=".0%")
+                st.plotly_chart(fig_private, use_container_width=True)
+
+            st.dataframe(utilization[selected_images].drop(columns="image_share").round({"utilization": 4}),
+                         use_container_width=True)
 
-    with col1:
-        st.subheader("模組 × 規則違規熱力圖")
-        violation_heat = pd.DataFrame()
-        violations = []
-
-        # 初始化所有違規變數
-        v1 = v2 = v3 = pd.DataFrame()
-        v4_high_mismatch = v4_low_mismatch = pd.DataFrame()
-        v4 = pd.DataFrame()
-
-        # 規則 1: High realtime in ext_memory
-        v1 = df_filtered[(df_filtered["symbol_realtime"] == "High") & df_filtered["symbol_physical_memory"].str.contains("ext")]
-        if not v1.empty:
-            logger.warning(f"發現 {len(v1)} 個 High Realtime 符號在低速記憶體中")
-            violations.append(("High Realtime 符號放入低速記憶體", v1))
-
-        # 規則 2: Low realtime in high-cost memory
-        v2 = df_filtered[(df_filtered["symbol_realtime"] == "Low") & df_filtered["symbol_physical_memory"].isin(["ilm", "dlm", "sysram"])]
-        if not v2.empty:
-            logger.warning(f"發現 {len(v2)} 個 Low Realtime 符號在高速記憶體中")
-            violations.append(("Low Realtime 符號放入高速記憶體", v2))
-
-        # 規則 3: hw_usage = Yes 放入 ext memory
-        v3 = df_filtered[(df_filtered["symbol_hw_usage"] == "Yes") & df_filtered["symbol_physical_memory"].str.contains("ext")]
-        if not v3.empty:
-            logger.warning(f"發現 {len(v3)} 個 HW Usage 符號在外部記憶體中")
-            violations.append(("HW Usage 符號放入外部記憶體", v3))
-
-        # 規則 4: symbol_realtime 與 symbol_access_count 不一致
-        v4_high_mismatch = df_filtered[(df_filtered["symbol_realtime"] == "High") & (df_filtered["symbol_access_count"] < 33)]
-        v4_low_mismatch = df_filtered[(df_filtered["symbol_realtime"] == "Low") & (df_filtered["symbol_access_count"] > 66)]
-        v4 = pd.concat([v4_high_mismatch, v4_low_mismatch])
-        if not v4.empty:
-            logger.warning(f"發現 {len(v4)} 個 Realtime 等級與存取次數不一致的符號")
-            violations.append(("Realtime 等級與存取次數不一致", v4))
-
-        if violations:
-            for title, df_ in violations:
-                heat_part = df_.groupby("symbol_module")["symbol_name"].count().reset_index()
-                heat_part.columns = ["symbol_module", title]
-                violation_heat = pd.merge(violation_heat, heat_part, on="symbol_module", how="outer") if not violation_heat.empty else heat_part
-            violation_heat = violation_heat.fillna(0).set_index("symbol_module")
-            fig_heat = px.imshow(violation_heat, text_auto=True, aspect="auto", color_continuous_scale="Reds")
-            st.plotly_chart(fig_heat, use_container_width=True)
-
-            # 顯示異常表格
-            for title, df_ in violations:
-                st.markdown(f"### {title} ({len(df_)})")
-                st.dataframe(df_, use_container_width=True)
-        else:
-            st.success("未偵測到異常配置！")
+# Tab 3: 異常分析
+with tab3_col1:
+    # 違規列位置在工作程序中計算；只有顯示表格時才取出違規資料
+    violation_positions = [
+        (title, positions) for title, positions in sharded_table.violation_positions(column_filters, logger)
+        if len(positions)
+    ]
+    violation_lengths = {title: len(positions) for title, positions in violation_positions}
+    with violation_count_slot.container():
+        st.caption("精確結果")
+        for col, (title, _, _) in zip(st.columns(len(VIOLATION_RULES)), VIOLATION_RULES):
+            col.metric(title, f"{violation_lengths.get(title, 0):,}")
+            col.caption("精確值")
+
+    # 多映像工作區以「映像 / 模組」為列
+    heat_keys = image_keys + ["symbol_module"]
+    st.subheader("映像 × 模組 × 規則違規熱力圖" if multi_image else "模組 × 規則違規熱力圖")
+    violation_heat = pd.DataFrame()
+
+    if violation_positions:
+        for title, positions in violation_positions:
+            heat_part = symbol_df[heat_keys].iloc[positions].value_counts(sort=False)
+            heat_part = heat_part[heat_part > 0].rename(title).reset_index()
+            violation_heat = pd.merge(violation_heat, heat_part, on=heat_keys, how="outer") if not violation_heat.empty else heat_part
+        violation_heat = violation_heat.fillna(0).set_index(heat_keys)
+        if multi_image:
+            violation_heat.index = [f"{image} / {module}" for image, module in violation_heat.index]
+        fig_heat = px.imshow(violation_heat, text_auto=True, aspect="auto", color_continuous_scale="Reds")
+        st.plotly_chart(fig_heat, use_container_width=True)
+
+        # 顯示異常表格
+        for title, positions in violation_positions:
+            st.markdown(f"### {title} ({len(positions)})")
+            st.dataframe(symbol_df.iloc[positions], use_container_width=True)
+    else:
+        st.success("未偵測到異常配置！")
 
 # Tab 4: 詳細資料
 with tab4:
@@ -354,21 +637,77 @@ with tab4:
     st.subheader("Symbol 細節表")
     st.dataframe(df_filtered, use_container_width=True)
 
-def generate_violation_report(violations):
+@st.cache_resource
+def get_report_jobs():
+    """
+    取得所有 session 共用的背景報告產生器。
+
+    Returns:
+        ReportJobs: 背景報告產生器
+    """
+    return ReportJobs()
+
+@st.cache_data
+def load_dataset_fingerprint(path, mtime):
+    """
+    計算資料檔案雜湊值，作為報告快取鍵的一部分。
+
+    Args:
+        path (str): 資料檔案路徑
+        mtime (float): 檔案修改時間，僅作為快取鍵
+
+    Returns:
+        str: SHA-1 十六進位字串
     """
-    產生違規報告的Markdown格式文字。
+    return dataset_fingerprint(path)
+
+def violation_frames(df, violation_positions):
+    """
+    依違規列位置取出各規則的違規資料。
 
     Args:
-        violations (list): 違規清單
+        df (pd.DataFrame): 完整符號資料
+        violation_positions (list): [(規則標題, 列位置 np.ndarray), ...]
 
     Returns:
-        str: Markdown格式的報告內容
+        list: [(規則標題, 違規資料 DataFrame), ...]
     """
-    md = "# Symbol Violation Summary\n\n"
-    for title, df_ in violations:
-        md += f"## {title} ({len(df_)})\n\n"
-        md += df_.head(10).to_markdown(index=False) + "\n\n... (略)\n\n"
-    return md
+    return [(title, df.iloc[positions]) for title, positions in violation_positions]
+
+def wait_for_report(report_key):
+    """
+    報告產生中時顯示提示；完成（或失敗）後重新執行頁面以顯示結果。
+
+    Args:
+        report_key (str): 報告快取鍵
+    """
+    if not get_report_jobs().is_pending(report_key):
+        st.rerun()
+    st.info("完整異常報告產生中，完成後會自動顯示下載按鈕...")
+
+# 支援 fragment 時只在報告產生中定時檢查，完成後不再輪詢
+if _fragment is not None:
+    wait_for_report = _fragment(run_every=2)(wait_for_report)
+
+def render_report_downloads(report_key):
+    """
+    顯示報告下載按鈕；報告仍在產生中時顯示提示，產生失敗時顯示錯誤。
+
+    Args:
+        report_key (str): 報告快取鍵
+    """
+    jobs = get_report_jobs()
+    reports = jobs.get(report_key)
+    if reports is not None:
+        st.download_button("匯出異常報表 CSV", reports["csv"], file_name="violations.csv")
+        st.download_button("匯出 Markdown 報告", reports["markdown"], file_name="violation_summary.md")
+        st.download_button("匯出 HTML 報告", reports["html"], file_name="violation_summary.html", mime="text/html")
+    elif jobs.error(report_key) is not None:
+        st.error(f"完整異常報告產生失敗: {jobs.error(report_key)}")
+    elif _fragment is not None:
+        wait_for_report(report_key)
+    else:
+        st.info("完整異常報告產生中，請稍後重新整理頁面...")
 
 # 匯出功能（含異常報表與 Markdown 報告）
 if st.button("下載資料 CSV"):
@@ -377,9 +716,9 @@ if st.button("下載資料 CSV"):
     st.download_button("下載資料 CSV", csv_data, file_name="symbols.csv")
     logger.info(f"資料匯出完成，共 {len(df_filtered)} 筆記錄")
 
-if violations:
-    all_violations_df = pd.concat([df for _, df in violations], ignore_index=True)
-    st.download_button("匯出異常報表 CSV", all_violations_df.to_csv(index=False).encode("utf-8-sig"), file_name="violations.csv")
-
-    md = generate_violation_report(violations)
-    st.download_button("匯出 Markdown 報告", md.encode("utf-8"), file_name="violation_summary.md")
+# 完整異常報告在背景產生，依 (資料集雜湊, 規則集, 篩選條件) 快取
+if violation_positions:
+    report_key = report_cache_key(load_dataset_fingerprint(data_path, data_mtime), column_filters)
+    # 違規資料在背景執行緒中才取出，報告已快取時不會建立
+    get_report_jobs().request(report_key, partial(violation_frames, symbol_df, violation_positions), column_filters)
+    render_report_downloads(report_key)
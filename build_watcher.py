@@ -0,0 +1,298 @@
+"""
+Build Watcher Module
+
+此模組監看 CI 輸出的符號資料夾，自動匯入新的建置資料，主要功能包括：
+- 偵測監看資料夾中新出現的符號 CSV 檔案
+- 只處理新檔案，將建置資訊附加到建置目錄 (build catalog)
+- 計算每個建置的記憶體區域 × 模組彙總並附加到彙總檔
+- 提供背景執行緒與命令列兩種執行方式
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from analyzer import add_symbol_cost
+
+# 預設路徑設定
+WATCH_DIR = "data/incoming"
+CATALOG_PATH = "data/build_catalog.csv"
+ROLLUP_PATH = "data/build_rollups.csv"
+
+# 預設輪詢間隔（秒）
+POLL_INTERVAL = 5.0
+
+# 檔案最後修改後需經過的秒數，避免讀到 CI 尚未寫完的檔案
+MIN_FILE_AGE = 2.0
+
+CATALOG_COLUMNS = [
+    "build_id", "file_name", "path", "file_size", "file_mtime", "ingested_at",
+    "symbol_count", "total_size", "total_cost"
+]
+ROLLUP_COLUMNS = [
+    "build_id", "symbol_physical_memory", "symbol_module",
+    "symbol_count", "total_size", "total_cost"
+]
+
+logger = logging.getLogger("build_watcher")
+
+# 同一個程序內的匯入互斥鎖
+_ingest_lock = threading.Lock()
+
+# 匯入失敗的檔案: {路徑: 失敗時的修改時間}；檔案更新後才重試
+_failed_files = {}
+
+def load_catalog(catalog_path=CATALOG_PATH):
+    """
+    讀取建置目錄。
+
+    Args:
+        catalog_path (str, optional): 建置目錄 CSV 路徑. 預設為"data/build_catalog.csv".
+
+    Returns:
+        pd.DataFrame: 依匯入順序排列的建置目錄；檔案不存在時回傳空的 DataFrame
+    """
+    if not os.path.exists(catalog_path):
+        return pd.DataFrame(columns=CATALOG_COLUMNS)
+    return pd.read_csv(catalog_path)
+
+def latest_build(catalog_path=CATALOG_PATH):
+    """
+    取得最新匯入的建置。
+
+    Args:
+        catalog_path (str, optional): 建置目錄 CSV 路徑. 預設為"data/build_catalog.csv".
+
+    Returns:
+        dict: 最新建置的目錄資料；尚無建置時回傳 None
+    """
+    catalog = load_catalog(catalog_path)
+    if catalog.empty:
+        return None
+    return catalog.iloc[-1].to_dict()
+
+def summarize_build(df):
+    """
+    計算單一建置的記憶體區域 × 模組彙總。
+
+    Args:
+        df (pd.DataFrame): 建置的符號資料
+
+    Returns:
+        pd.DataFrame: 欄位為 symbol_physical_memory, symbol_module,
+            symbol_count, total_size, total_cost
+    """
+    if "symbol_cost" not in df.columns:
+        df = add_symbol_cost(df)
+    return df.groupby(["symbol_physical_memory", "symbol_module"], observed=True).agg(
+        symbol_count=("symbol_size", "size"),
+        total_size=("symbol_size", "sum"),
+        total_cost=("symbol_cost", "sum")
+    ).reset_index()
+
+def find_new_files(watch_dir=WATCH_DIR, catalog_path=CATALOG_PATH, min_age=MIN_FILE_AGE):
+    """
+    找出監看資料夾中尚未匯入的 CSV 檔案。
+
+    Args:
+        watch_dir (str, optional): 監看資料夾. 預設為"data/incoming".
+        catalog_path (str, optional): 建置目錄 CSV 路徑. 預設為"data/build_catalog.csv".
+        min_age (float, optional): 檔案最後修改後需經過的秒數. 預設為 2 秒.
+
+    Returns:
+        list: 依修改時間排序的新檔案路徑
+
+    備註:
+        - 曾匯入失敗的檔案會略過，直到其修改時間改變
+    """
+    if not os.path.isdir(watch_dir):
+        return []
+    known = set(load_catalog(catalog_path)["file_name"])
+    now = time.time()
+    candidates = []
+    with os.scandir(watch_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith(".csv") or entry.name in known:
+                continue
+            mtime = entry.stat().st_mtime
+            if now - mtime < min_age or _failed_files.get(entry.path) == mtime:
+                continue
+            candidates.append((mtime, entry.path))
+    return [path for _, path in sorted(candidates)]
+
+def ingest_file(path, catalog_path=CATALOG_PATH, rollup_path=ROLLUP_PATH):
+    """
+    匯入單一建置檔案，將彙總與目錄資料附加到既有檔案。
+
+    Args:
+        path (str): 新建置的符號 CSV 路徑
+        catalog_path (str, optional): 建置目錄 CSV 路徑. 預設為"data/build_catalog.csv".
+        rollup_path (str, optional): 建置彙總 CSV 路徑. 預設為"data/build_rollups.csv".
+
+    Returns:
+        dict: 新增的建置目錄資料
+
+    備註:
+        - 只讀取新檔案，不會重新讀取歷史建置
+        - 彙總先寫入，目錄最後寫入；目錄中存在的建置即代表已完整匯入
+        - 寫入彙總前先建立該建置的未完成標記，寫入目錄後移除；
+          只有標記仍存在（先前匯入中斷）時才讀取彙總檔移除殘留資料，正常匯入不會重新讀取歷史彙總
+    """
+    file_name = os.path.basename(path)
+    build_id = os.path.splitext(file_name)[0]
+    stat = os.stat(path)
+
+    df = add_symbol_cost(pd.read_csv(path))
+    rollup = summarize_build(df)
+    rollup.insert(0, "build_id", build_id)
+
+    entry = {
+        "build_id": build_id,
+        "file_name": file_name,
+        "path": path,
+        "file_size": stat.st_size,
+        "file_mtime": stat.st_mtime,
+        "ingested_at": pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "symbol_count": len(df),
+        "total_size": int(df["symbol_size"].sum()),
+        "total_cost": float(df["symbol_cost"].sum())
+    }
+
+    for out_path in (rollup_path, catalog_path):
+        directory = os.path.dirname(out_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    marker = _pending_marker(build_id, rollup_path)
+    if os.path.exists(marker):
+        _drop_rollup_rows(build_id, rollup_path)
+    else:
+        open(marker, "w").close()
+    rollup[ROLLUP_COLUMNS].to_csv(rollup_path, mode="a", index=False,
+                                  header=not os.path.exists(rollup_path))
+    pd.DataFrame([entry], columns=CATALOG_COLUMNS).to_csv(catalog_path, mode="a", index=False,
+                                                         header=not os.path.exists(catalog_path))
+    os.remove(marker)
+    logger.info(f"匯入建置 {build_id}，共 {len(df)} 筆符號")
+    return entry
+
+def _pending_marker(build_id, rollup_path):
+    """
+    取得建置匯入未完成標記的路徑（與彙總檔放在同一個資料夾）。
+    """
+    return f"{rollup_path}.{build_id}.pending"
+
+def _drop_rollup_rows(build_id, rollup_path):
+    """
+    移除彙總檔中指定建置的既有資料（只在上次匯入中斷時才需要重寫檔案）。
+    """
+    if not os.path.exists(rollup_path):
+        return
+    if build_id not in set(pd.read_csv(rollup_path, usecols=["build_id"], dtype=str)["build_id"]):
+        return
+    logger.warning(f"移除建置 {build_id} 先前中斷匯入所殘留的彙總資料")
+    rollups = pd.read_csv(rollup_path, dtype={"build_id": str})
+    rollups[rollups["build_id"] != build_id].to_csv(rollup_path + ".tmp", index=False)
+    os.replace(rollup_path + ".tmp", rollup_path)
+
+def poll_once(watch_dir=WATCH_DIR, catalog_path=CATALOG_PATH, rollup_path=ROLLUP_PATH,
+              min_age=MIN_FILE_AGE):
+    """
+    執行一次輪詢，匯入所有新檔案。
+
+    Args:
+        watch_dir (str, optional): 監看資料夾. 預設為"data/incoming".
+        catalog_path (str, optional): 建置目錄 CSV 路徑. 預設為"data/build_catalog.csv".
+        rollup_path (str, optional): 建置彙總 CSV 路徑. 預設為"data/build_rollups.csv".
+        min_age (float, optional): 檔案最後修改後需經過的秒數. 預設為 2 秒.
+
+    Returns:
+        list: 本次匯入的建置目錄資料
+
+    備註:
+        - 匯入失敗的檔案只記錄一次錯誤，檔案修改後才會重試
+        - 輪詢期間消失的檔案直接略過
+    """
+    ingested = []
+    with _ingest_lock:
+        for path in find_new_files(watch_dir, catalog_path, min_age):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                # 檔案在輪詢期間被移除或改名，下次輪詢再處理
+                logger.warning(f"建置檔案已不存在，略過: {path}")
+                continue
+            try:
+                ingested.append(ingest_file(path, catalog_path, rollup_path))
+                _failed_files.pop(path, None)
+            except Exception as e:
+                _failed_files[path] = mtime
+                logger.error(f"匯入建置檔案失敗 {path}: {str(e)}")
+    return ingested
+
+def watch_folder(watch_dir=WATCH_DIR, interval=POLL_INTERVAL, stop_event=None,
+                 catalog_path=CATALOG_PATH, rollup_path=ROLLUP_PATH):
+    """
+    持續輪詢監看資料夾，直到 stop_event 被設定。
+
+    Args:
+        watch_dir (str, optional): 監看資料夾. 預設為"data/incoming".
+        interval (float, optional): 輪詢間隔秒數. 預設為 5 秒.
+        stop_event (threading.Event, optional): 停止訊號；None 表示持續執行
+        catalog_path (str, optional): 建置目錄 CSV 路徑. 預設為"data/build_catalog.csv".
+        rollup_path (str, optional): 建置彙總 CSV 路徑. 預設為"data/build_rollups.csv".
+
+    備註:
+        - 單次輪詢發生例外時只記錄錯誤，下一個間隔繼續輪詢
+    """
+    stop_event = stop_event or threading.Event()
+    logger.info(f"開始監看資料夾: {watch_dir}")
+    while not stop_event.is_set():
+        try:
+            poll_once(watch_dir, catalog_path, rollup_path)
+        except Exception:
+            # 單次輪詢失敗（例如目錄檔損毀）不應結束背景執行緒
+            logger.exception("輪詢監看資料夾失敗")
+        stop_event.wait(interval)
+
+def start_background_watcher(watch_dir=WATCH_DIR, interval=POLL_INTERVAL,
+                             catalog_path=CATALOG_PATH, rollup_path=ROLLUP_PATH):
+    """
+    以 daemon 執行緒在背景監看資料夾。
+
+    Args:
+        watch_dir (str, optional): 監看資料夾. 預設為"data/incoming".
+        interval (float, optional): 輪詢間隔秒數. 預設為 5 秒.
+        catalog_path (str, optional): 建置目錄 CSV 路徑. 預設為"data/build_catalog.csv".
+        rollup_path (str, optional): 建置彙總 CSV 路徑. 預設為"data/build_rollups.csv".
+
+    Returns:
+        threading.Event: 設定後即停止監看的事件
+    """
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=watch_folder,
+        args=(watch_dir, interval, stop_event, catalog_path, rollup_path),
+        name="build-watcher",
+        daemon=True
+    )
+    thread.start()
+    return stop_event
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description="監看 CI 輸出資料夾並匯入新的符號資料")
+    parser.add_argument("--watch-dir", default=WATCH_DIR, help="監看資料夾")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="輪詢間隔秒數")
+    parser.add_argument("--once", action="store_true", help="只執行一次輪詢後結束")
+    args = parser.parse_args()
+    if args.once:
+        poll_once(args.watch_dir)
+    else:
+        watch_folder(args.watch_dir, args.interval)
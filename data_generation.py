@@ -5,14 +5,15 @@ Symbol Data Generation Module
 - 產生模擬的符號資料
 - 設定記憶體配置規則
 - 產生符合實際情況的記憶體使用分布
+- 以亂數種子產生可重現的資料，並提供不同規模的預設組合
 
 Author: swchen.tw
 Version: 1.0.0
 """
 
+import argparse
 import pandas as pd
 import numpy as np
-import random
 import os
 import csv
 import logging
@@ -44,22 +45,173 @@ FOLDER_NAMES = [
     "open_base/hal", "open_base/prj_ram", "open_base/exthal"
 ]
 
-def generate_symbol_data(num_symbols=1500, outfile="data/symbols.csv"):
+# 預設記憶體區域配置: 容量、配置權重與起始位址
+DEFAULT_REGION_MAP = {
+    "ilm": {"capacity": 64 * 1024, "weight": 10, "base": 0x80000000},           # 64KB
+    "dlm": {"capacity": 64 * 1024, "weight": 10, "base": 0x80100000},           # 64KB
+    "sysram": {"capacity": 256 * 1024, "weight": 8, "base": 0x80200000},        # 256KB
+    "ext_memory1": {"capacity": 1024 * 1024, "weight": 2, "base": 0x90000000},  # 1MB
+    "ext_memory2": {"capacity": 1024 * 1024, "weight": 2, "base": 0xA0000000}   # 1MB
+}
+
+# 未指定起始位址時，區域由此位址開始依序排列並以 64KB 對齊
+REGION_BASE_ADDRESS = 0x80000000
+REGION_ALIGNMENT = 64 * 1024
+
+REALTIME_LEVELS = ["High", "Medium", "Low"]
+OUTPUT_SECTION_TYPES = ["code", "data", "init", "always_power_on", "ro_after_write"]
+INPUT_SECTIONS = ["code", "data", "bss"]
+
+# 不同規模的預設組合（區域容量依符號數量與預期平均大小計算，見 preset_region_map）
+SCALE_PRESETS = {
+    "10k": {"num_symbols": 10_000, "num_modules": 100, "num_files": 1_000},
+    "100k": {"num_symbols": 100_000, "num_modules": 200, "num_files": 5_000},
+    "1M": {"num_symbols": 1_000_000, "num_modules": 500, "num_files": 20_000},
+    "10M": {"num_symbols": 10_000_000, "num_modules": 1_000, "num_files": 100_000},
+}
+
+# 預設組合共用的分布設定（大小上限 64KB，保留 Zipf 長尾）
+PRESET_DISTRIBUTION = {"size_distribution": "zipf", "size_range": (16, 64 * 1024), "realtime_correlation": 0.7}
+
+# 預設組合的區域容量相對於預期用量的餘裕，讓以小型符號補足的情況很少發生
+PRESET_CAPACITY_HEADROOM = 1.5
+
+def expected_symbol_size(distribution, size_range, zipf_exponent):
+    """
+    計算符號大小分布的期望值。
+
+    Args:
+        distribution (str): "uniform" 或 "zipf"
+        size_range (tuple): (最小, 最大) 大小，最大值不含
+        zipf_exponent (float): Zipf 分布指數
+
+    Returns:
+        float: 預期平均大小（bytes）
+    """
+    low, high = size_range
+    if distribution == "uniform":
+        return (low + high - 1) / 2
+    # 截斷的 Pareto 分布: E[min(X, H)] = L + ∫_L^H (L/x)^α dx，α = zipf_exponent - 1
+    alpha = zipf_exponent - 1
+    if np.isclose(alpha, 1):
+        return low + low * np.log(high / low)
+    return low + low ** alpha * (high ** (1 - alpha) - low ** (1 - alpha)) / (1 - alpha)
+
+def preset_region_map(num_symbols, mean_size, region_map=DEFAULT_REGION_MAP, headroom=PRESET_CAPACITY_HEADROOM):
+    """
+    依符號數量與平均大小計算各區域容量，容量依配置權重分配並保留餘裕。
+
+    Args:
+        num_symbols (int): 符號數量
+        mean_size (float): 預期平均符號大小
+        region_map (dict, optional): 提供區域名稱與權重的配置. 預設為 DEFAULT_REGION_MAP.
+        headroom (float, optional): 容量相對於預期用量的倍數. 預設為 1.5.
+
+    Returns:
+        dict: 新的記憶體區域配置（起始位址依序排列並對齊）
+    """
+    total_weight = sum(region["weight"] for region in region_map.values())
+    result = {}
+    for name, region in region_map.items():
+        expected = num_symbols * mean_size * region["weight"] / total_weight
+        capacity = int(-(-expected * headroom // REGION_ALIGNMENT)) * REGION_ALIGNMENT
+        result[name] = {"capacity": max(capacity, region["capacity"]), "weight": region["weight"]}
+    return result
+
+def _region_bases(region_map):
+    """
+    取得各區域起始位址；未指定者接在前一區域之後依序排列。
+    """
+    bases = []
+    next_base = REGION_BASE_ADDRESS
+    for region in region_map.values():
+        base = region.get("base", next_base)
+        bases.append(base)
+        end = base + region["capacity"]
+        next_base = max(next_base, -(-end // REGION_ALIGNMENT) * REGION_ALIGNMENT)
+    return np.array(bases, dtype=np.uint64)
+
+def _draw_sizes(rng, n, distribution, size_range, zipf_exponent):
+    """
+    產生符號大小。
+
+    Args:
+        rng (np.random.Generator): 亂數產生器
+        n (int): 數量
+        distribution (str): "uniform" 或 "zipf"
+        size_range (tuple): (最小, 最大) 大小，最大值不含
+        zipf_exponent (float): Zipf 分布指數
+
+    Returns:
+        np.ndarray: 符號大小
+    """
+    low, high = size_range
+    if distribution == "uniform":
+        return rng.integers(low, high, n)
+    if distribution == "zipf":
+        # 大多數符號很小，少數符號很大（長尾）；以連續的 Pareto 分布取代離散 Zipf，避免大小只有 low 的倍數
+        sizes = low * (1 + rng.pareto(zipf_exponent - 1, n))
+        return np.minimum(sizes, high - 1).astype(np.int64)
+    raise ValueError(f"不支援的大小分布: {distribution}")
+
+def _place(sizes, regions, capacities, used, bases):
+    """
+    依序將符號放入所屬區域，超出容量的符號不放入。
+
+    Args:
+        sizes (np.ndarray): 符號大小
+        regions (np.ndarray): 符號所屬區域索引
+        capacities (np.ndarray): 各區域容量
+        used (np.ndarray): 各區域已使用量（會被更新）
+        bases (np.ndarray): 各區域起始位址
+
+    Returns:
+        tuple: (放入的符號遮罩, 符號位址)
+    """
+    keep = np.zeros(len(sizes), dtype=bool)
+    addresses = np.zeros(len(sizes), dtype=np.uint64)
+    for r in range(len(capacities)):
+        idx = np.flatnonzero(regions == r)
+        end = used[r] + np.cumsum(sizes[idx])
+        fits = end <= capacities[r]
+        if fits.any():
+            placed = idx[fits]
+            keep[placed] = True
+            addresses[placed] = bases[r] + (end[fits] - sizes[placed]).astype(np.uint64)
+            used[r] = end[fits][-1]
+    return keep, addresses
+
+def generate_symbol_data(num_symbols=None, outfile="data/symbols.csv", seed=None, preset=None,
+                         num_modules=None, num_files=None, size_distribution=None,
+                         size_range=None, zipf_exponent=1.5, realtime_correlation=None,
+                         region_map=None):
     """
     產生模擬的符號記憶體配置資料。
 
     Args:
         num_symbols (int, optional): 要產生的符號數量. 預設為1500.
-        outfile (str, optional): 輸出CSV檔案路徑. 預設為"data/symbols.csv".
+        outfile (str, optional): 輸出CSV檔案路徑；None 表示不寫檔. 預設為"data/symbols.csv".
+        seed (int, optional): 亂數種子；相同種子與參數產生相同資料. 預設為None（不固定）.
+        preset (str, optional): SCALE_PRESETS 中的規模名稱（"10k"、"100k"、"1M"、"10M"），
+            提供未指定參數的預設值.
+        num_modules (int, optional): 模組數量. 預設為 9~19 之間的亂數.
+        num_files (int, optional): 來源檔案數量. 預設為 49~99 之間的亂數.
+        size_distribution (str, optional): "uniform" 或 "zipf". 預設為"uniform"（preset 為"zipf"）.
+        size_range (tuple, optional): 符號大小範圍 (最小, 最大). 預設為 (16, 2048)（preset 為 (16, 65536)）.
+        zipf_exponent (float, optional): Zipf 分布指數，越大小符號越多. 預設為1.5.
+        realtime_correlation (float, optional): 0~1，即時性需求依存取次數決定的比例.
+            預設為0（preset 為0.7）.
+        region_map (dict, optional): {區域: {"capacity", "weight", "base"(可省略)}}.
+            預設為 DEFAULT_REGION_MAP（preset 依符號數量與預期平均大小計算容量）.
 
     Returns:
         pd.DataFrame: 包含以下欄位的DataFrame：
-            - symbol_name: 符號名稱
+            - symbol_name: 符號名稱（不重複）
             - symbol_module: 所屬模組
             - symbol_filename: 來源檔案
             - input_section: 輸入段落
             - symbol_size: 符號大小
-            - symbol_address: 記憶體位址
+            - symbol_address: 記憶體位址（各區域內連續配置）
             - symbol_physical_memory: 實體記憶體位置
             - symbol_out_section: 輸出段落
             - symbol_output_section: 輸出區段類型
@@ -68,132 +220,173 @@ def generate_symbol_data(num_symbols=1500, outfile="data/symbols.csv"):
             - symbol_hw_usage: 硬體使用標記
             - symbol_folder_name_for_file: 資料夾路徑
 
-    記憶體限制:
+    記憶體限制（預設）:
         - ilm: 64KB
         - dlm: 64KB
         - sysram: 256KB
         - ext_memory1: 1MB
         - ext_memory2: 1MB
+
+    Raises:
+        ValueError: 記憶體容量不足以放入指定數量的符號，或參數不合法
     """
     logger = setup_logging()
-    logger.info(f"Generating {num_symbols} synthetic symbols...")
+    rng = np.random.default_rng(seed)
 
-    # 記憶體配置與權重定義
-    memory_weights = {
-        "ilm": 10, "dlm": 10,
-        "sysram": 8,
-        "ext_memory1": 2, "ext_memory2": 2
-    }
-    memory_types = list(memory_weights.keys())
-
-    # 各記憶體區域大小限制
-    memory_max_size = {
-        "ilm": 64 * 1024,      # 64KB
-        "dlm": 64 * 1024,      # 64KB
-        "sysram": 256 * 1024,  # 256KB
-        "ext_memory1": 1024 * 1024,  # 1MB
-        "ext_memory2": 1024 * 1024   # 1MB
-    }
+    if preset is not None:
+        if preset not in SCALE_PRESETS:
+            raise ValueError(f"未知的規模預設: {preset}")
+        settings = SCALE_PRESETS[preset]
+        num_symbols = num_symbols or settings["num_symbols"]
+        num_modules = num_modules or settings["num_modules"]
+        num_files = num_files or settings["num_files"]
+        size_distribution = size_distribution or PRESET_DISTRIBUTION["size_distribution"]
+        size_range = size_range or PRESET_DISTRIBUTION["size_range"]
+        if realtime_correlation is None:
+            realtime_correlation = PRESET_DISTRIBUTION["realtime_correlation"]
+        region_map = region_map or preset_region_map(
+            num_symbols, expected_symbol_size(size_distribution, size_range, zipf_exponent)
+        )
+    num_symbols = 1500 if num_symbols is None else num_symbols
+    size_distribution = size_distribution or "uniform"
+    size_range = size_range or (16, 2048)
+    realtime_correlation = realtime_correlation or 0.0
+    region_map = region_map or DEFAULT_REGION_MAP
+    logger.info(f"Generating {num_symbols} synthetic symbols (seed={seed}, preset={preset})...")
+
+    # 記憶體區域配置
+    memory_types = list(region_map.keys())
+    capacities = np.array([region_map[m]["capacity"] for m in memory_types], dtype=np.int64)
+    weights = np.array([region_map[m]["weight"] for m in memory_types], dtype=float)
+    bases = _region_bases(region_map)
+    used = np.zeros(len(memory_types), dtype=np.int64)
+
+    # 模組、檔案與資料夾: 每個檔案屬於一個模組與一個資料夾
+    num_modules = num_modules or int(rng.integers(10, 21)) - 1
+    num_files = num_files or int(rng.integers(50, 101)) - 1
+    modules = np.array([f"module_{i}" for i in range(1, num_modules + 1)], dtype=object)
+    filenames = np.array([f"file_{i}.c" for i in range(1, num_files + 1)], dtype=object)
+    file_module = rng.integers(0, num_modules, num_files)
+    file_folder = rng.integers(0, len(FOLDER_NAMES), num_files)
+    folders = np.array(FOLDER_NAMES, dtype=object)
 
-    # 資料欄位定義
-    modules = [f"module_{i}" for i in range(1, random.randint(10, 20))]
-    filenames = [f"file_{i}.c" for i in range(1, random.randint(50, 100))]
-    realtime_levels = ["High", "Medium", "Low"]
-    output_section_types = ["code", "data", "init", "always_power_on", "ro_after_write"]
-    
     # 產生符號資料
-    records = []
-    memory_usage = {mem: 0 for mem in memory_types}
-    
-    for i in range(num_symbols):
-        # 基本符號資訊
-        symbol_name = f"symbol_{i}"
-        module = random.choice(modules)
-        filename = random.choice(filenames)
-        
-        # 記憶體配置相關
-        size = np.random.randint(16, 2048)  # 16B ~ 2KB
-        memory = random.choices(memory_types, weights=[memory_weights[m] for m in memory_types])[0]
-        
-        # 檢查記憶體限制
-        if memory_usage[memory] + size > memory_max_size[memory]:
-            continue
-        memory_usage[memory] += size
-        
-        # 其他屬性
-        input_section = random.choice(["code", "data", "bss"])
-        out_section = f"{memory}_{'code' if input_section == 'code' else 'data'}"
-        address = hex(np.random.randint(0x80000000, 0x8FFFFFFF))
-        output_section = random.choice(output_section_types)
-        realtime = random.choices(realtime_levels, weights=[2, 3, 5])[0]
-        access_count = np.random.randint(0, 101)
-        hw_usage = random.choice(["Yes", "No"])
-        
-        records.append({
-            "symbol_name": symbol_name,
-            "symbol_module": module,
-            "symbol_filename": filename,
-            "input_section": input_section,
-            "symbol_size": size,
-            "symbol_address": address,
-            "symbol_physical_memory": memory,
-            "symbol_out_section": out_section,
-            "symbol_output_section": output_section,
-            "symbol_realtime": realtime,
-            "symbol_access_count": access_count,
-            "symbol_hw_usage": hw_usage,
-            "symbol_folder_name_for_file": random.choice(FOLDER_NAMES)
-        })
-
-    # 確保產生足夠的資料
-    while len(records) < num_symbols:
-        size = np.random.randint(16, 128)  # 產生較小的符號
-        memory = random.choices(memory_types, weights=[memory_weights[m] for m in memory_types])[0]
-        if memory_usage[memory] + size <= memory_max_size[memory]:
-            # 加入新的小符號
-            records.append(generate_small_symbol(size, memory, memory_weights, modules, filenames))
-            memory_usage[memory] += size
-
-    os.makedirs(os.path.dirname(outfile), exist_ok=True)
-    df = pd.DataFrame(records)
-    df.to_csv(outfile, index=False, quoting=csv.QUOTE_NONNUMERIC)
-    logger.info(f"✅ Generated {len(df)} symbols → {outfile}")
+    sizes = _draw_sizes(rng, num_symbols, size_distribution, size_range, zipf_exponent)
+    regions = rng.choice(len(memory_types), num_symbols, p=weights / weights.sum())
+    keep, addresses = _place(sizes, regions, capacities, used, bases)
+    sizes, regions, addresses = sizes[keep], regions[keep], addresses[keep]
+    n = len(sizes)
+
+    input_section = rng.choice(INPUT_SECTIONS, n)
+    access_count = rng.integers(0, 101, n)
+    realtime = rng.choice(REALTIME_LEVELS, n, p=[0.2, 0.3, 0.5])
+    if realtime_correlation > 0:
+        # 依存取次數決定即時性需求: >66 High，33~66 Medium，<33 Low
+        derived = np.where(access_count > 66, "High", np.where(access_count >= 33, "Medium", "Low"))
+        realtime = np.where(rng.random(n) < realtime_correlation, derived, realtime)
+    files = rng.integers(0, num_files, n)
+    memory = np.array(memory_types, dtype=object)[regions]
+
+    columns = {
+        "symbol_name": [f"symbol_{i}" for i in range(n)],
+        "symbol_module": modules[file_module[files]],
+        "symbol_filename": filenames[files],
+        "input_section": input_section,
+        "symbol_size": sizes,
+        "symbol_address": addresses,
+        "symbol_physical_memory": memory,
+        "symbol_out_section": memory + np.where(input_section == "code", "_code", "_data").astype(object),
+        "symbol_output_section": rng.choice(OUTPUT_SECTION_TYPES, n),
+        "symbol_realtime": realtime,
+        "symbol_access_count": access_count,
+        "symbol_hw_usage": rng.choice(["Yes", "No"], n),
+        "symbol_folder_name_for_file": folders[file_folder[files]]
+    }
+    df = pd.DataFrame(columns)
+
+    # 確保產生足夠的資料: 以小型符號補足，只放入仍有空間的區域
+    small = []
+    while n + sum(len(part) for part in small) < num_symbols:
+        missing = num_symbols - n - sum(len(part) for part in small)
+        room = (capacities - used) >= 128
+        if not room.any():
+            raise ValueError(
+                f"記憶體容量不足: 只能放入 {num_symbols - missing} / {num_symbols} 個符號，"
+                "請加大 region_map 容量或使用 preset"
+            )
+        small.append(generate_small_symbols(rng, missing, memory_types, room, weights, capacities, used,
+                                            bases, modules, filenames, file_module, folders, file_folder,
+                                            start=num_symbols - missing))
+    if small:
+        df = pd.concat([df] + small, ignore_index=True)
+
+    df["symbol_address"] = [hex(a) for a in df["symbol_address"].to_numpy(dtype=np.uint64)]
+
+    if outfile is not None:
+        directory = os.path.dirname(outfile)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        df.to_csv(outfile, index=False, quoting=csv.QUOTE_NONNUMERIC)
+        logger.info(f"✅ Generated {len(df)} symbols → {outfile}")
     logger.info("Memory usage summary:")
-    for mem, usage in memory_usage.items():
-        logger.info(f"{mem}: {usage/1024:.1f}KB / {memory_max_size[mem]/1024:.1f}KB")
-    
+    for mem, usage, capacity in zip(memory_types, used, capacities):
+        logger.info(f"{mem}: {usage/1024:.1f}KB / {capacity/1024:.1f}KB")
+
     return df
 
-def generate_small_symbol(size, memory, memory_weights, modules, filenames):
+def generate_small_symbols(rng, count, memory_types, room, weights, capacities, used, bases,
+                           modules, filenames, file_module, folders, file_folder, start):
     """
-    產生一個小型符號的資料記錄。
+    產生一批小型符號（16B ~ 128B）以補足符號數量。
 
     Args:
-        size (int): 符號大小
-        memory (str): 指定的記憶體區域
-        memory_weights (dict): 記憶體權重字典
-        modules (list): 可用的模組列表
-        filenames (list): 可用的檔案名稱列表
+        rng (np.random.Generator): 亂數產生器
+        count (int): 要補足的符號數量
+        memory_types (list): 記憶體區域名稱
+        room (np.ndarray): 各區域是否仍有空間
+        weights (np.ndarray): 記憶體區域權重
+        capacities (np.ndarray): 各區域容量
+        used (np.ndarray): 各區域已使用量（會被更新）
+        bases (np.ndarray): 各區域起始位址
+        modules (np.ndarray): 模組名稱
+        filenames (np.ndarray): 檔案名稱
+        file_module (np.ndarray): 每個檔案所屬的模組索引
+        folders (np.ndarray): 資料夾名稱
+        file_folder (np.ndarray): 每個檔案所屬的資料夾索引
+        start (int): 符號名稱的起始編號，確保名稱不重複
 
     Returns:
-        dict: 包含單一符號所有屬性的字典
-    """
-    output_section_types = ["code", "data", "init", "always_power_on", "ro_after_write"]
-    return {
-        "symbol_name": f"small_symbol_{random.randint(1000, 9999)}",
-        "symbol_module": random.choice(modules),
-        "symbol_filename": random.choice(filenames),
-        "input_section": random.choice(["code", "data", "bss"]),
-        "symbol_size": size,
-        "symbol_address": hex(np.random.randint(0x80000000, 0x8FFFFFFF)),
+        pd.DataFrame: 放得下的小型符號（可能少於 count 筆）
+    """
+    sizes = rng.integers(16, 128, count)
+    p = np.where(room, weights, 0)
+    regions = rng.choice(len(memory_types), count, p=p / p.sum())
+    keep, addresses = _place(sizes, regions, capacities, used, bases)
+    sizes, regions, addresses = sizes[keep], regions[keep], addresses[keep]
+    n = len(sizes)
+    memory = np.array(memory_types, dtype=object)[regions]
+    files = rng.integers(0, len(filenames), n)
+    return pd.DataFrame({
+        "symbol_name": [f"small_symbol_{i}" for i in range(start, start + n)],
+        "symbol_module": modules[file_module[files]],
+        "symbol_filename": filenames[files],
+        "input_section": rng.choice(INPUT_SECTIONS, n),
+        "symbol_size": sizes,
+        "symbol_address": addresses,
         "symbol_physical_memory": memory,
-        "symbol_out_section": f"{memory}_data",
-        "symbol_output_section": random.choice(output_section_types),
+        "symbol_out_section": memory + "_data",
+        "symbol_output_section": rng.choice(OUTPUT_SECTION_TYPES, n),
         "symbol_realtime": "Low",
-        "symbol_access_count": np.random.randint(0, 33),
+        "symbol_access_count": rng.integers(0, 33, n),
         "symbol_hw_usage": "No",
-        "symbol_folder_name_for_file": random.choice(FOLDER_NAMES)
-    }
+        "symbol_folder_name_for_file": folders[file_folder[files]]
+    })
 
 if __name__ == "__main__":
-    generate_symbol_data()
+    parser = argparse.ArgumentParser(description="產生模擬的符號記憶體配置資料")
+    parser.add_argument("--preset", choices=list(SCALE_PRESETS), default=None, help="規模預設")
+    parser.add_argument("--num-symbols", type=int, default=None, help="符號數量")
+    parser.add_argument("--seed", type=int, default=None, help="亂數種子")
+    parser.add_argument("--outfile", default="data/symbols.csv", help="輸出CSV檔案路徑")
+    args = parser.parse_args()
+    generate_symbol_data(num_symbols=args.num_symbols, outfile=args.outfile, seed=args.seed, preset=args.preset)
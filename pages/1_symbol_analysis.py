@@ -9,30 +9,39 @@ parent_dir = str(Path(__file__).parent.parent)
 sys.path.append(parent_dir)
 
 from app import load_data
+from analyzer import filter_spec
+from workspace import IMAGE_COLUMN
 
 st.set_page_config(page_title="Symbol Analysis", page_icon="🔍", layout="wide")
 st.title("Symbol Analysis")
 
 # 檢查是否有篩選後的資料
-if 'filtered_data' not in st.session_state:
+if 'sharded_table' not in st.session_state:
     st.warning("請先回到首頁設定篩選條件")
     st.stop()
 
-# 使用已篩選的資料
-df_filtered = st.session_state['filtered_data']
+# 使用首頁的篩選條件與資料表
 filters = st.session_state['filter_conditions']
+sharded_table = st.session_state['sharded_table']
+column_filters = filter_spec(filters)
 
 with st.expander("目前篩選條件"):
     st.write(filters)
 
 # 直接顯示 Treemap
 st.subheader("記憶體分布 Treemap")
-module_sizes = (df_filtered.groupby("symbol_module")["symbol_size"].sum() / 1024).to_dict()
-df_filtered["module_total_size"] = df_filtered["symbol_module"].map(module_sizes)
+module_sizes = (sharded_table.group_sum("symbol_module", ("symbol_size",), column_filters)["symbol_size"] / 1024).to_dict()
+df_filtered = sharded_table.filtered_frame(column_filters)
+df_filtered = df_filtered.assign(module_total_size=df_filtered["symbol_module"].map(module_sizes))
+# 多映像工作區加入映像維度
+multi_image = IMAGE_COLUMN in df_filtered.columns
+tree_path = ["symbol_physical_memory", "symbol_module", "symbol_name"]
+if multi_image:
+    tree_path.insert(1, IMAGE_COLUMN)
 
 fig_tree = px.treemap(
     df_filtered,
-    path=["symbol_physical_memory", "symbol_module", "symbol_name"],
+    path=tree_path,
     values="symbol_size",
     color="symbol_cost",
     color_continuous_scale="RdBu",
@@ -58,8 +67,11 @@ st.plotly_chart(fig_tree, use_container_width=True)
 
 # 記憶體使用統計
 st.subheader("記憶體使用統計")
-mem_stats = df_filtered.groupby("symbol_physical_memory").agg({
-    "symbol_size": ["sum", "count", "mean"]
+size_keys = ["symbol_physical_memory", IMAGE_COLUMN] if multi_image else "symbol_physical_memory"
+size_sum = sharded_table.group_sum(size_keys, ("symbol_size",), column_filters)
+mem_stats = pd.DataFrame({
+    "總大小(bytes)": size_sum["symbol_size"],
+    "符號數量": size_sum["symbol_count"],
+    "平均大小(bytes)": size_sum["symbol_size"] / size_sum["symbol_count"]
 }).round(2)
-mem_stats.columns = ["總大小(bytes)", "符號數量", "平均大小(bytes)"]
 st.dataframe(mem_stats)
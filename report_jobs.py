@@ -0,0 +1,397 @@
+"""
+Report Jobs Module
+
+此模組在背景產生異常檢測報告並加以快取，主要功能包括：
+- 產生完整的 Markdown 報告、自含式 HTML 報告與完整違規清單 CSV
+- 以 (資料集雜湊, 規則集, 篩選條件) 作為快取鍵
+- 以執行緒池在背景產生報告，結果保存在記憶體並寫入磁碟
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import hashlib
+import html
+import inspect
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from analyzer import VIOLATION_RULES
+from workspace import discover_images
+
+# 報告磁碟快取目錄
+REPORT_DIR = "data/reports"
+
+# 報告格式版本；修改報告內容或格式時遞增，使舊的磁碟快取失效
+REPORT_VERSION = 1
+
+# 記憶體中保留的報告數量
+MAX_CACHED_REPORTS = 16
+
+# 報告檔案名稱
+REPORT_FILES = {
+    "markdown": "violation_summary.md",
+    "html": "violation_summary.html",
+    "csv": "violations.csv"
+}
+
+logger = logging.getLogger("report_jobs")
+
+def dataset_fingerprint(path, block_size=1 << 20):
+    """
+    計算資料檔案內容的雜湊值。
+
+    Args:
+        path (str): 資料檔案路徑，或多映像工作區資料夾（依序雜湊各映像名稱與內容）
+        block_size (int, optional): 每次讀取的位元組數. 預設為 1MB.
+
+    Returns:
+        str: SHA-1 十六進位字串
+    """
+    files = discover_images(path) if os.path.isdir(path) else {None: path}
+    digest = hashlib.sha1()
+    for name, file_path in files.items():
+        if name is not None:
+            digest.update(name.encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def rule_set_signature():
+    """
+    取得目前異常檢測規則集的識別字串。
+
+    Returns:
+        str: 由報告格式版本、規則標題、規則函式名稱，以及定義規則的模組原始碼雜湊組成的字串
+
+    備註:
+        - 雜湊整個模組的原始碼，規則使用的輔助函式或常數（如成本權重）修改後，舊的磁碟快取也會失效
+    """
+    modules = {rule.__module__: inspect.getmodule(rule) for _, rule, _ in VIOLATION_RULES}
+    sources = hashlib.sha1()
+    for name in sorted(modules):
+        try:
+            sources.update(inspect.getsource(modules[name]).encode("utf-8"))
+        except (OSError, TypeError):
+            # 無法取得原始碼（例如只有 .pyc）時只能依模組名稱與 REPORT_VERSION 區分
+            sources.update(name.encode("utf-8"))
+    rules = [(title, rule.__name__) for title, rule, _ in VIOLATION_RULES]
+    return json.dumps([REPORT_VERSION, rules, sources.hexdigest()], ensure_ascii=False)
+
+def report_cache_key(dataset_hash, filters):
+    """
+    產生報告快取鍵。
+
+    Args:
+        dataset_hash (str): dataset_fingerprint 的回傳值
+        filters (dict): {column_name: filter_values} 篩選條件
+
+    Returns:
+        str: SHA-1 十六進位字串
+
+    備註:
+        - 篩選值會排序，空的篩選條件會忽略，因此順序不同的相同條件共用快取
+    """
+    spec = {column: sorted(map(str, values)) for column, values in filters.items() if values}
+    payload = json.dumps([dataset_hash, rule_set_signature(), spec], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def module_summary(violations):
+    """
+    計算各模組的違規統計。
+
+    Args:
+        violations (list): [(規則標題, 違規資料 DataFrame), ...]
+
+    Returns:
+        pd.DataFrame: 以模組為索引，欄位為各規則違規筆數、違規總數與違規符號總大小
+    """
+    if not violations:
+        return pd.DataFrame()
+    counts = pd.concat(
+        {title: df_.groupby("symbol_module", observed=True)["symbol_name"].count() for title, df_ in violations},
+        axis=1
+    ).fillna(0).astype(int)
+    counts["違規總數"] = counts.sum(axis=1)
+    # 同一列違反多條規則時只計算一次；以列索引判斷，符號名稱可能重複（static 符號、多映像）
+    all_violations = pd.concat([df_ for _, df_ in violations])
+    all_violations = all_violations[~all_violations.index.duplicated()]
+    counts["違規符號總大小(bytes)"] = all_violations.groupby("symbol_module", observed=True)["symbol_size"].sum()
+    counts.index.name = "symbol_module"
+    return counts.sort_values("違規總數", ascending=False)
+
+def render_markdown(violations, filters=None):
+    """
+    產生完整的 Markdown 違規報告。
+
+    Args:
+        violations (list): [(規則標題, 違規資料 DataFrame), ...]
+        filters (dict, optional): 報告使用的篩選條件
+
+    Returns:
+        str: Markdown格式的報告內容
+    """
+    md = "# Symbol Violation Summary\n\n"
+    if filters:
+        md += "篩選條件: " + ", ".join(f"{column}={values}" for column, values in filters.items() if values) + "\n\n"
+    summary = module_summary(violations)
+    if not summary.empty:
+        md += "## 模組違規統計\n\n" + summary.reset_index().to_markdown(index=False) + "\n\n"
+    for title, df_ in violations:
+        md += f"## {title} ({len(df_)})\n\n"
+        md += df_.to_markdown(index=False) + "\n\n"
+    return md
+
+def render_html(violations, filters=None):
+    """
+    產生自含式 HTML 違規報告（不依賴外部資源）。
+
+    Args:
+        violations (list): [(規則標題, 違規資料 DataFrame), ...]
+        filters (dict, optional): 報告使用的篩選條件
+
+    Returns:
+        str: HTML 文件內容
+    """
+    style = (
+        "body{font-family:sans-serif;margin:2em;}"
+        "table{border-collapse:collapse;margin-bottom:2em;font-size:0.9em;}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left;}"
+        "th{background:#f0f0f0;}"
+    )
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\"><title>Symbol Violation Summary</title>",
+        f"<style>{style}</style></head><body>",
+        "<h1>Symbol Violation Summary</h1>",
+    ]
+    if filters:
+        conditions = ", ".join(f"{column}={values}" for column, values in filters.items() if values)
+        parts.append(f"<p>篩選條件: {html.escape(conditions)}</p>")
+
+    parts.append("<h2>規則違規統計</h2><ul>")
+    for title, df_ in violations:
+        parts.append(f"<li>{html.escape(title)}: {len(df_)}</li>")
+    parts.append("</ul>")
+
+    summary = module_summary(violations)
+    if not summary.empty:
+        parts.append("<h2>模組違規統計</h2>")
+        parts.append(summary.reset_index().to_html(index=False, border=0))
+    for title, df_ in violations:
+        parts.append(f"<h2>{html.escape(title)} ({len(df_)})</h2>")
+        parts.append(df_.to_html(index=False, border=0))
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+def render_violation_csv(violations):
+    """
+    產生完整違規清單 CSV，每筆資料加上所違反的規則。
+
+    Args:
+        violations (list): [(規則標題, 違規資料 DataFrame), ...]
+
+    Returns:
+        bytes: UTF-8 (BOM) 編碼的 CSV
+    """
+    if not violations:
+        return "".encode("utf-8-sig")
+    all_violations = pd.concat(
+        [df_.assign(violation_rule=title) for title, df_ in violations], ignore_index=True
+    )
+    return all_violations.to_csv(index=False).encode("utf-8-sig")
+
+def build_reports(violations, filters=None):
+    """
+    產生所有格式的違規報告。
+
+    Args:
+        violations (list): [(規則標題, 違規資料 DataFrame), ...]
+        filters (dict, optional): 報告使用的篩選條件
+
+    Returns:
+        dict: {"markdown": bytes, "html": bytes, "csv": bytes}
+    """
+    return {
+        "markdown": render_markdown(violations, filters).encode("utf-8"),
+        "html": render_html(violations, filters).encode("utf-8"),
+        "csv": render_violation_csv(violations)
+    }
+
+class ReportJobs:
+    """
+    背景報告產生器，依快取鍵保存報告結果。
+
+    Args:
+        report_dir (str, optional): 報告磁碟快取目錄；None 表示不寫入磁碟. 預設為"data/reports".
+        max_workers (int, optional): 背景執行緒數量. 預設為 2.
+        max_cached (int, optional): 記憶體與磁碟中各保留的報告數量. 預設為 16.
+
+    備註:
+        - 同一個快取鍵只會產生一次報告，重複要求會沿用進行中或已完成的結果
+        - 程式重啟後，會從磁碟快取讀回已產生過的報告；磁碟快取超過 max_cached 份時刪除最久未使用的報告
+        - 產生失敗的報告會記錄錯誤並保留失敗狀態（見 error），不會自動重試
+    """
+
+    def __init__(self, report_dir=REPORT_DIR, max_workers=2, max_cached=MAX_CACHED_REPORTS):
+        self.report_dir = report_dir
+        self.max_cached = max_cached
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-job")
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._failed = {}
+        self._reports = OrderedDict()
+
+    def _report_path(self, key, kind):
+        return os.path.join(self.report_dir, key, REPORT_FILES[kind])
+
+    def _load_from_disk(self, key):
+        """
+        從磁碟快取讀取報告；不存在時回傳 None。
+        """
+        if self.report_dir is None:
+            return None
+        paths = {kind: self._report_path(key, kind) for kind in REPORT_FILES}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+        reports = {}
+        for kind, path in paths.items():
+            with open(path, "rb") as f:
+                reports[kind] = f.read()
+        # 更新目錄修改時間，作為磁碟快取的最近使用時間
+        os.utime(os.path.join(self.report_dir, key))
+        return reports
+
+    def _save_to_disk(self, key, reports):
+        """
+        將報告寫入磁碟快取（先寫暫存檔再改名，避免讀到寫一半的檔案）。
+        """
+        if self.report_dir is None:
+            return
+        os.makedirs(os.path.join(self.report_dir, key), exist_ok=True)
+        for kind, content in reports.items():
+            path = self._report_path(key, kind)
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """
+        磁碟快取超過 max_cached 份時，刪除最久未使用的報告。
+        """
+        entries = [entry for entry in os.scandir(self.report_dir) if entry.is_dir()]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:max(len(entries) - self.max_cached, 0)]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            logger.info(f"刪除報告快取: {entry.name}")
+
+    def _remember(self, key, reports):
+        with self._lock:
+            self._reports[key] = reports
+            self._reports.move_to_end(key)
+            while len(self._reports) > self.max_cached:
+                self._reports.popitem(last=False)
+
+    def _run(self, key, violations, filters):
+        try:
+            if callable(violations):
+                violations = violations()
+            reports = build_reports(violations, filters)
+            self._save_to_disk(key, reports)
+            self._remember(key, reports)
+            logger.info(f"報告產生完成: {key}")
+            return reports
+        except Exception as e:
+            logger.exception(f"報告產生失敗: {key}")
+            with self._lock:
+                self._failed[key] = str(e)
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def get(self, key):
+        """
+        取得已完成的報告。
+
+        Args:
+            key (str): report_cache_key 的回傳值
+
+        Returns:
+            dict: {"markdown", "html", "csv"} 的位元組內容；尚未完成時回傳 None
+        """
+        with self._lock:
+            if key in self._reports:
+                self._reports.move_to_end(key)
+                return self._reports[key]
+        reports = self._load_from_disk(key)
+        if reports is not None:
+            self._remember(key, reports)
+        return reports
+
+    def request(self, key, violations, filters=None):
+        """
+        取得報告；尚未產生時在背景開始產生。
+
+        Args:
+            key (str): report_cache_key 的回傳值
+            violations (list | callable): [(規則標題, 違規資料 DataFrame), ...]，
+                或回傳此列表的函式（在背景執行緒中才取出違規資料）
+            filters (dict, optional): 報告使用的篩選條件
+
+        Returns:
+            dict: 已完成的報告；仍在產生中或產生失敗時回傳 None
+        """
+        reports = self.get(key)
+        if reports is not None:
+            return reports
+        with self._lock:
+            if key in self._reports:
+                return self._reports[key]
+            if key not in self._pending and key not in self._failed:
+                logger.info(f"開始產生報告: {key}")
+                self._pending[key] = self._executor.submit(self._run, key, violations, filters)
+        return None
+
+    def is_pending(self, key):
+        """
+        報告是否仍在產生中。
+        """
+        with self._lock:
+            return key in self._pending
+
+    def error(self, key):
+        """
+        取得報告產生失敗的錯誤訊息。
+
+        Returns:
+            str: 錯誤訊息；未失敗時回傳 None
+        """
+        with self._lock:
+            return self._failed.get(key)
+
+    def wait(self, key, timeout=None):
+        """
+        等待報告產生完成。
+
+        Args:
+            key (str): report_cache_key 的回傳值
+            timeout (float, optional): 最長等待秒數
+
+        Returns:
+            dict: 已完成的報告；沒有進行中的工作且無快取，或產生失敗時回傳 None
+        """
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            return future.result(timeout)
+        return self.get(key)
@@ -0,0 +1,185 @@
+"""
+Stratified Sampling Module
+
+此模組提供快速預覽模式所需的分層抽樣與估計功能，主要功能包括：
+- 在資料載入時依記憶體區域與模組建立分層樣本
+- 以分層估計量推估分組總和與筆數
+- 計算估計值的信賴區間
+
+樣本大小固定，因此無論原始資料多大，預覽的計算時間都大致相同。
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from analyzer import VIOLATION_RULES
+
+# 預設分層欄位
+DEFAULT_STRATA = ["symbol_physical_memory", "symbol_module"]
+
+# 預設目標樣本大小
+DEFAULT_SAMPLE_SIZE = 20000
+
+# 每層最少抽樣筆數（層內筆數不足時全取）
+MIN_PER_STRATUM = 30
+
+# 樣本中記錄分層資訊的欄位
+STRATUM_COLUMN = "_stratum"
+STRATUM_SIZE_COLUMN = "_stratum_size"
+STRATUM_SAMPLE_COLUMN = "_stratum_sample"
+
+def build_stratified_sample(df, strata=None, sample_size=DEFAULT_SAMPLE_SIZE,
+                            min_per_stratum=MIN_PER_STRATUM, seed=0):
+    """
+    建立分層隨機樣本。
+
+    Args:
+        df (pd.DataFrame): 完整符號資料
+        strata (list, optional): 分層欄位. 預設為記憶體區域與模組.
+        sample_size (int, optional): 目標樣本大小. 預設為 20000.
+        min_per_stratum (int, optional): 每層最少抽樣筆數. 預設為 30.
+        seed (int, optional): 亂數種子. 預設為 0.
+
+    Returns:
+        pd.DataFrame: 樣本資料，額外包含以下欄位：
+            - _stratum: 分層編號
+            - _stratum_size: 該層母體筆數 N_h
+            - _stratum_sample: 該層樣本筆數 n_h
+
+    備註:
+        - 樣本筆數不超過 sample_size：各層先取 min_per_stratum 筆（層內筆數不足時全取），
+          剩餘預算依各層剩餘筆數比例配置
+        - 層數乘上 min_per_stratum 超過 sample_size 時，只保留最大的層，其餘較小的層合併為一層
+        - 資料筆數不超過 sample_size 時，樣本即為完整資料（估計值等於精確值）
+    """
+    strata = strata or DEFAULT_STRATA
+    if df.empty:
+        sample = df.copy()
+        for column in (STRATUM_COLUMN, STRATUM_SIZE_COLUMN, STRATUM_SAMPLE_COLUMN):
+            sample[column] = pd.Series(dtype="int64")
+        return sample
+
+    stratum = df.groupby(strata, sort=False, observed=True).ngroup().to_numpy()
+    population = np.bincount(stratum)
+
+    max_strata = max(1, sample_size // max(1, min_per_stratum))
+    if len(population) > max_strata:
+        # 合併較小的層，使每層最少筆數不會超出樣本預算
+        remap = np.full(len(population), max_strata - 1, dtype=np.int64)
+        largest = np.argsort(-population, kind="stable")[:max_strata - 1]
+        remap[largest] = np.arange(len(largest))
+        stratum = remap[stratum]
+        population = np.bincount(stratum, minlength=max_strata)
+    allocated = _allocate(population, sample_size, min_per_stratum)
+
+    # 層內隨機排序後取前 n_h 筆
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(df)), stratum))
+    starts = np.concatenate(([0], np.cumsum(population)[:-1]))
+    rank = np.arange(len(df)) - starts[stratum[order]]
+    picked = np.sort(order[rank < allocated[stratum[order]]])
+
+    sample = df.iloc[picked].copy()
+    sample[STRATUM_COLUMN] = stratum[picked]
+    sample[STRATUM_SIZE_COLUMN] = population[stratum[picked]]
+    sample[STRATUM_SAMPLE_COLUMN] = allocated[stratum[picked]]
+    return sample
+
+def _allocate(population, sample_size, min_per_stratum):
+    """
+    配置各層樣本數，總和不超過 sample_size（資料筆數較多時恰為 sample_size）。
+    """
+    if population.sum() <= sample_size:
+        return population.astype(np.int64)
+    base = np.minimum(population, min_per_stratum)
+    budget = sample_size - base.sum()
+    excess = population - base
+    quota = excess * (budget / excess.sum())
+    extra = np.floor(quota).astype(np.int64)
+    # 最大餘數法分配捨去的筆數
+    leftover = int(budget - extra.sum())
+    if leftover > 0:
+        extra[np.argsort(extra - quota, kind="stable")[:leftover]] += 1
+    return (base + extra).astype(np.int64)
+
+def estimate_total(sample, value=None, by=None, confidence=0.95):
+    """
+    以分層估計量推估（篩選後）母體的總和或筆數。
+
+    Args:
+        sample (pd.DataFrame): build_stratified_sample 產生的樣本，可先經過篩選
+        value (str, optional): 要加總的欄位；None 表示計算筆數
+        by (str, optional): 分組欄位；None 表示不分組
+        confidence (float, optional): 信賴水準. 預設為 0.95.
+
+    Returns:
+        pd.DataFrame: 以分組值為索引（不分組時索引為 "total"），欄位包含：
+            - estimate: 估計值
+            - stderr: 標準誤
+            - lower / upper: 信賴區間下限 / 上限
+
+    備註:
+        - 篩選後的樣本視為子母體估計: 未入選的樣本以 0 計入各層變異數
+        - 變異數含有限母體校正 (1 - n_h / N_h)，完整抽樣的層變異數為 0
+    """
+    columns = ["estimate", "stderr", "lower", "upper"]
+    if sample.empty:
+        return pd.DataFrame(columns=columns, dtype=float)
+
+    y = sample[value].astype(float) if value else pd.Series(1.0, index=sample.index)
+    keys = sample[by] if by else pd.Series("total", index=sample.index)
+    parts = pd.DataFrame({
+        "key": keys.to_numpy(),
+        STRATUM_COLUMN: sample[STRATUM_COLUMN].to_numpy(),
+        "y": y.to_numpy(),
+        "y2": (y * y).to_numpy(),
+    })
+    cells = parts.groupby(["key", STRATUM_COLUMN], sort=False, observed=True).agg(
+        y=("y", "sum"), y2=("y2", "sum")
+    ).reset_index()
+
+    sizes = sample.groupby(STRATUM_COLUMN)[[STRATUM_SIZE_COLUMN, STRATUM_SAMPLE_COLUMN]].first()
+    N = sizes[STRATUM_SIZE_COLUMN].reindex(cells[STRATUM_COLUMN]).to_numpy().astype(float)
+    n = sizes[STRATUM_SAMPLE_COLUMN].reindex(cells[STRATUM_COLUMN]).to_numpy().astype(float)
+
+    y_sum = cells["y"].to_numpy()
+    y2_sum = cells["y2"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s2 = np.where(n > 1, (y2_sum - y_sum * y_sum / n) / (n - 1), 0.0)
+    cells["total"] = N / n * y_sum
+    cells["variance"] = np.clip(N * N * (1 - n / N) * s2 / n, 0, None)
+
+    result = cells.groupby("key", sort=False, observed=True)[["total", "variance"]].sum()
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    stderr = np.sqrt(result["variance"])
+    estimate = pd.DataFrame({
+        "estimate": result["total"],
+        "stderr": stderr,
+        "lower": (result["total"] - z * stderr).clip(lower=0),
+        "upper": result["total"] + z * stderr,
+    })
+    estimate.index.name = by
+    return estimate
+
+def estimate_violation_counts(sample, confidence=0.95):
+    """
+    推估各異常檢測規則的違規筆數。
+
+    Args:
+        sample (pd.DataFrame): build_stratified_sample 產生的樣本，可先經過篩選
+        confidence (float, optional): 信賴水準. 預設為 0.95.
+
+    Returns:
+        pd.DataFrame: 以規則標題為索引，欄位同 estimate_total
+    """
+    rows = {}
+    for title, rule, _ in VIOLATION_RULES:
+        hits = sample[rule(sample)] if not sample.empty else sample
+        total = estimate_total(hits, confidence=confidence)
+        rows[title] = total.iloc[0] if not total.empty else pd.Series(0.0, index=total.columns)
+    return pd.DataFrame(rows).T
@@ -0,0 +1,339 @@
+"""
+Sharded Execution Module
+
+此模組將符號資料轉為欄式陣列放入共享記憶體，以多個程序平行計算，主要功能包括：
+- 將字串欄位編碼為類別代碼，與數值欄位一起放入共享記憶體
+- 依列範圍切分資料，在程序池中套用篩選條件、異常檢測規則與分組加總
+- 合併各分片的部分結果
+- 資料量小時直接在目前程序中計算
+
+工作程序只接收共享記憶體名稱、列範圍與篩選條件，不傳遞 DataFrame。
+所有資料表共用同一個程序池，同時載入多份資料時程序數量不會倍增。
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from analyzer import FILTER_COLUMNS, VIOLATION_RULES, filter_mask
+
+# 資料筆數達此門檻才啟用多程序計算
+SHARD_MIN_ROWS = 500000
+
+# 每個分片最少筆數，避免切得過細
+MIN_SHARD_ROWS = 100000
+
+# 共用程序池的工作程序數量
+POOL_WORKERS = os.cpu_count() or 1
+
+# 放入共享記憶體的數值欄位
+NUMERIC_COLUMNS = ["symbol_size", "symbol_access_count", "symbol_cost"]
+
+# 放入共享記憶體的類別欄位（篩選、規則與分組使用）
+CATEGORY_COLUMNS = list(dict.fromkeys(FILTER_COLUMNS.values()))
+
+# 所有資料表共用的程序池（第一次使用時建立）
+_executor = None
+_executor_lock = threading.Lock()
+
+def _shared_executor():
+    """
+    取得所有資料表共用的程序池。
+
+    Returns:
+        ProcessPoolExecutor: 以 spawn 啟動、最多 POOL_WORKERS 個工作程序的程序池
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def _encode_columns(df):
+    """
+    將資料轉為欄式陣列。
+
+    Args:
+        df (pd.DataFrame): 符號資料
+
+    Returns:
+        dict: {column: (np.ndarray, categories)}；數值欄位的 categories 為 None
+    """
+    columns = {}
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            categorical = pd.Categorical(df[column])
+            columns[column] = (np.asarray(categorical.codes, dtype=np.int32), list(categorical.categories))
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            columns[column] = (df[column].to_numpy(dtype=np.float64), None)
+    return columns
+
+def _build_frame(columns, start, stop):
+    """
+    以欄式陣列的 [start, stop) 範圍建立 DataFrame（類別欄位保持代碼形式）。
+    """
+    data = {}
+    for column, (values, categories) in columns.items():
+        part = values[start:stop]
+        if categories is not None:
+            part = pd.Categorical.from_codes(part, categories=categories)
+        data[column] = part
+    return pd.DataFrame(data, copy=False)
+
+def _compute(frame, task, args, offset):
+    """
+    在單一分片上執行計算。
+
+    Args:
+        frame (pd.DataFrame): 分片資料
+        task (str): "count"、"rows"、"violations" 或 "group_sum"
+        args (dict): 任務參數，包含 filters 以及 group_sum 的 by / values
+        offset (int): 分片在完整資料中的起始列
+
+    Returns:
+        int | np.ndarray | list | dict: count 回傳符合篩選條件的筆數；rows 回傳符合篩選條件的列位置；
+            violations 回傳各規則違規列位置；group_sum 回傳各欄位的部分加總
+    """
+    mask = filter_mask(frame, args.get("filters")).to_numpy()
+    if task == "count":
+        return int(mask.sum())
+    if task == "rows":
+        return np.flatnonzero(mask) + offset
+    if task == "violations":
+        return [np.flatnonzero(mask & rule(frame).to_numpy()) + offset for _, rule, _ in VIOLATION_RULES]
+
+    # 多個分組欄位時將各欄代碼組合成單一代碼
+    codes = np.zeros(len(frame), dtype=np.int64)
+    size = 1
+    keep = mask
+    for key in args["by"]:
+        key_codes = frame[key].cat.codes.to_numpy()
+        keep = keep & (key_codes >= 0)
+        codes = codes * len(frame[key].cat.categories) + key_codes
+        size *= len(frame[key].cat.categories)
+    codes = codes[keep]
+    partial = {"symbol_count": np.bincount(codes, minlength=size)}
+    for value in args["values"]:
+        partial[value] = np.bincount(codes, weights=frame[value].to_numpy()[keep], minlength=size)
+    return partial
+
+def _run_shard(layout, n_rows, start, stop, task, args):
+    """
+    工作程序進入點：連接共享記憶體並計算 [start, stop) 分片。
+    """
+    blocks = {}
+    try:
+        columns = {}
+        for column, (name, dtype, categories) in layout.items():
+            blocks[column] = SharedMemory(name=name)
+            values = np.ndarray((n_rows,), dtype=dtype, buffer=blocks[column].buf)
+            columns[column] = (values, categories)
+            del values
+        frame = _build_frame(columns, start, stop)
+        result = _compute(frame, task, args, start)
+        # 關閉共享記憶體前須先釋放所有指向它的陣列
+        del frame, columns
+        return result
+    finally:
+        for block in blocks.values():
+            block.close()
+
+def _release(blocks):
+    """
+    釋放共享記憶體（共用程序池不隨資料表關閉）。
+    """
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+class ShardedTable:
+    """
+    放在共享記憶體中的欄式符號資料，支援多程序篩選、規則檢測與分組加總。
+
+    Args:
+        df (pd.DataFrame): 符號資料
+        workers (int, optional): 分片數量上限. 預設為共用程序池的工作程序數量 (POOL_WORKERS).
+        min_rows (int, optional): 啟用多程序的最少筆數. 預設為 500,000.
+
+    備註:
+        - 資料只在建立時複製一次到共享記憶體，之後每次計算只傳遞篩選條件
+        - 筆數低於 min_rows 或 workers 為 1 時，直接在目前程序中計算
+        - 所有資料表共用同一個程序池（見 _shared_executor），資料表本身只擁有共享記憶體
+        - 使用完畢請呼叫 close()；仍有計算進行中時，等計算結束才釋放共享記憶體。
+          物件被回收時也會自動釋放
+    """
+
+    def __init__(self, df, workers=None, min_rows=SHARD_MIN_ROWS):
+        self.df = df
+        self.n_rows = len(df)
+        self.workers = workers or POOL_WORKERS
+        self.parallel = self.workers > 1 and self.n_rows >= min_rows
+        self.columns = _encode_columns(df)
+        self.categories = {column: categories for column, (_, categories) in self.columns.items()}
+        self._layout = {}
+        self._blocks = []
+        self._lock = threading.Lock()
+        self._active = 0
+        self._close_requested = False
+
+        if self.parallel:
+            # 複製到共享記憶體後只保留區塊名稱，本地陣列即可釋放
+            for column, (values, categories) in self.columns.items():
+                block = SharedMemory(create=True, size=max(values.nbytes, 1))
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+                self._layout[column] = (block.name, values.dtype.str, categories)
+                self._blocks.append(block)
+            self.columns = None
+        self._finalizer = weakref.finalize(self, _release, self._blocks)
+
+    def close(self):
+        """
+        釋放共享記憶體；其他 session 仍在計算時延後到計算結束才釋放。
+        """
+        with self._lock:
+            if self._active:
+                self._close_requested = True
+                return
+        self._finalizer()
+
+    def _shards(self):
+        """
+        依列範圍切分資料。
+
+        Returns:
+            list: [(start, stop), ...]
+        """
+        count = max(1, min(self.workers, self.n_rows // MIN_SHARD_ROWS))
+        bounds = np.linspace(0, self.n_rows, count + 1, dtype=np.int64)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _map(self, task, args):
+        """
+        對每個分片執行任務並回傳部分結果列表。
+        """
+        if not self.parallel:
+            return [_compute(_build_frame(self.columns, 0, self.n_rows), task, args, 0)]
+        with self._lock:
+            if not self._finalizer.alive:
+                raise RuntimeError("資料表已關閉")
+            self._active += 1
+        try:
+            executor = _shared_executor()
+            futures = [
+                executor.submit(_run_shard, self._layout, self.n_rows, int(start), int(stop), task, args)
+                for start, stop in self._shards()
+            ]
+            return [future.result() for future in futures]
+        finally:
+            with self._lock:
+                self._active -= 1
+                release = self._close_requested and not self._active
+            if release:
+                self._finalizer()
+
+    def count(self, filters=None):
+        """
+        計算符合篩選條件的筆數，等同 len(apply_filters(df, filters))。
+
+        Args:
+            filters (dict, optional): {column_name: filter_values} 篩選條件
+
+        Returns:
+            int: 符合篩選條件的筆數
+        """
+        if not any((filters or {}).values()):
+            return self.n_rows
+        return sum(self._map("count", {"filters": filters}))
+
+    def filtered_frame(self, filters=None):
+        """
+        取得符合篩選條件的資料，等同 apply_filters(df, filters)。
+
+        Args:
+            filters (dict, optional): {column_name: filter_values} 篩選條件
+
+        Returns:
+            pd.DataFrame: 符合篩選條件的資料；沒有篩選條件時直接回傳原始資料，呼叫端不可就地修改
+
+        備註:
+            - 篩選遮罩在工作程序中計算，目前程序只依列位置取出資料，只在確實需要資料表時才呼叫
+        """
+        if not any((filters or {}).values()):
+            return self.df
+        positions = np.concatenate(self._map("rows", {"filters": filters}))
+        return self.df.iloc[positions]
+
+    def group_sum(self, by, values=("symbol_cost",), filters=None):
+        """
+        分組加總，等同 df[篩選].groupby(by)[values].sum() 加上筆數。
+
+        Args:
+            by (str | list): 分組欄位（須為類別欄位），可為多個欄位
+            values (tuple, optional): 要加總的數值欄位. 預設為 ("symbol_cost",).
+            filters (dict, optional): {column_name: filter_values} 篩選條件
+
+        Returns:
+            pd.DataFrame: 以分組值（多欄位時為 MultiIndex）為索引，欄位為 values 各欄加總與 symbol_count；
+                僅包含至少有一筆資料的分組
+        """
+        keys = [by] if isinstance(by, str) else list(by)
+        partials = self._map("group_sum", {"by": keys, "values": list(values), "filters": filters})
+        merged = {key: sum(part[key] for part in partials) for key in partials[0]}
+        if isinstance(by, str):
+            index = pd.Index(self.categories[by], name=by)
+        else:
+            index = pd.MultiIndex.from_product([self.categories[key] for key in keys], names=keys)
+        result = pd.DataFrame(merged, index=index)
+        return result[result["symbol_count"] > 0][list(values) + ["symbol_count"]]
+
+    def violation_positions(self, filters=None, logger=None):
+        """
+        找出各異常檢測規則的違規列位置。
+
+        Args:
+            filters (dict, optional): {column_name: filter_values} 篩選條件
+            logger (logging.Logger, optional): 若提供，則記錄每條規則的違規數量
+
+        Returns:
+            list: [(規則標題, 依序排列的列位置 np.ndarray), ...]，涵蓋所有規則
+        """
+        partials = self._map("violations", {"filters": filters})
+        positions = []
+        for i, (title, _, message) in enumerate(VIOLATION_RULES):
+            rule_positions = np.concatenate([part[i] for part in partials])
+            if logger is not None and len(rule_positions):
+                logger.warning(message.format(count=len(rule_positions)))
+            positions.append((title, rule_positions))
+        return positions
+
+    def detect_violations(self, filters=None, logger=None):
+        """
+        依序執行所有異常檢測規則，結果同 analyzer.detect_violations(apply_filters(df, filters))。
+
+        Args:
+            filters (dict, optional): {column_name: filter_values} 篩選條件
+            logger (logging.Logger, optional): 若提供，則記錄每條規則的違規數量
+
+        Returns:
+            list: [(規則標題, 違規資料 DataFrame), ...]，僅包含有違規的規則
+
+        備註:
+            - 會在目前程序中取出每條規則的違規資料；只需要筆數或分組統計時請改用 violation_positions
+        """
+        return [
+            (title, self.df.iloc[positions])
+            for title, positions in self.violation_positions(filters, logger)
+            if len(positions)
+        ]
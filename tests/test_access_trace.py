@@ -0,0 +1,124 @@
+"""
+Access Trace Test Module
+
+此測試模組用於確保存取追蹤轉換為符號存取次數的功能正確，測試項目包括：
+- 位址對應到符號（含邊界與未命中的位址）
+- 分塊計數與逐一對應的結果一致
+- 二進位（記憶體映射）與文字格式的讀取
+- 存取次數寫回資料（原始命中次數與 0–100 百分位等級）
+- 更新符號資料檔案時只寫回指定的檔案
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_trace import SymbolIndex, apply_access_counts, count_trace_hits, update_symbol_file
+from analyzer import rule_realtime_access_mismatch
+import numpy as np
+import pandas as pd
+import pytest
+
+@pytest.fixture
+def symbol_df():
+    """
+    建立三個符號，其中 sym_b 與 sym_c 之間有空隙，且資料列未依位址排序。
+    """
+    return pd.DataFrame({
+        "symbol_name": ["sym_c", "sym_a", "sym_b"],
+        "symbol_address": ["0x80000200", "0x80000000", "0x80000100"],
+        "symbol_size": [0x40, 0x100, 0x80],
+        "symbol_access_count": [0, 0, 0],
+    })
+
+def test_lookup_boundaries(symbol_df):
+    """
+    測試位址區間的起點命中、終點不命中，空隙與範圍外的位址不命中。
+    """
+    index = SymbolIndex(symbol_df)
+    addresses = np.array([0x7FFFFFFF, 0x80000000, 0x800000FF, 0x80000100, 0x80000180, 0x8000023F, 0x80000240],
+                         dtype=np.uint64)
+    names = symbol_df["symbol_name"].to_numpy()[index.order]
+    slot = index.lookup(addresses)
+    mapped = [names[s] if s >= 0 else None for s in slot]
+    assert mapped == [None, "sym_a", "sym_a", "sym_b", None, "sym_c", None]
+
+def test_chunked_counts_match_lookup():
+    """
+    測試分塊計數結果與逐一對應後累計相同（含重疊的符號）。
+    """
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0x80000000, 0x80100000, 2000)
+    df = pd.DataFrame({
+        "symbol_address": [hex(s) for s in starts],
+        "symbol_size": rng.integers(16, 2048, 2000),
+    })
+    addresses = rng.integers(0x7FFF0000, 0x80110000, 200000).astype(np.uint32)
+
+    index = SymbolIndex(df)
+    slot = index.lookup(addresses.astype(np.uint64))
+    expected = np.bincount(slot[slot >= 0], minlength=len(df))
+    assert np.array_equal(index.count(addresses), expected), "分塊計數應與逐一對應結果一致"
+
+    counts, stats = count_trace_hits(addresses.tobytes(), df, "u32", chunk_size=30000)
+    assert np.array_equal(counts[index.order], expected), "多個分塊的累計結果應一致"
+    assert stats == {"total_samples": 200000, "matched_samples": int(expected.sum())}
+
+def test_binary_trace_file(symbol_df, tmp_path):
+    """
+    測試以記憶體映射讀取 u64 二進位追蹤檔案。
+    """
+    trace = tmp_path / "trace.bin"
+    np.array([0x80000000, 0x80000010, 0x80000200, 0x90000000], dtype="<u8").tofile(trace)
+    counts, stats = count_trace_hits(str(trace), symbol_df, "u64")
+    assert counts.tolist() == [1, 2, 0], "計數應與資料列順序對齊"
+    assert stats["matched_samples"] == 3
+
+def test_text_trace_and_apply(symbol_df, tmp_path):
+    """
+    測試讀取文字追蹤（含註解與十進位位址），並寫回原始命中次數與百分位等級。
+    """
+    trace = tmp_path / "trace.txt"
+    trace.write_text("# pc samples\n0x80000100\n0x80000104\n2147484160\n")
+    counts, _ = count_trace_hits(str(trace), symbol_df, "text", chunk_size=2)
+    updated = apply_access_counts(symbol_df, counts)
+    assert updated["symbol_access_hits"].tolist() == [1, 0, 2]
+    assert updated["symbol_access_count"].tolist() == [67, 0, 100]
+
+def test_update_symbol_file_writes_only_target(symbol_df, tmp_path):
+    """
+    測試更新存取次數只寫回指定的資料檔案，不影響其他資料來源。
+    """
+    user_csv = tmp_path / "symbols.csv"
+    build_csv = tmp_path / "nightly_001.csv"
+    symbol_df.to_csv(user_csv, index=False)
+    symbol_df.to_csv(build_csv, index=False)
+    before = user_csv.read_bytes()
+
+    trace = np.array([0x80000010, 0x80000210, 0x80000210], dtype="<u4").tobytes()
+    stats = update_symbol_file(str(build_csv), trace, "u32")
+    assert stats == {"total_samples": 3, "matched_samples": 3}
+
+    updated = pd.read_csv(build_csv)
+    assert updated.set_index("symbol_name")["symbol_access_hits"].to_dict() == {"sym_c": 2, "sym_a": 1, "sym_b": 0}
+    assert not os.path.exists(str(build_csv) + ".tmp"), "不應留下暫存檔"
+    assert user_csv.read_bytes() == before, "其他資料檔案不應被修改"
+
+def test_normalized_counts_fit_rule_scale():
+    """
+    測試數百萬次的命中次數正規化為 0–100，且規則 4 依相對存取頻率判斷。
+    """
+    hits = np.array([0, 10, 5000, 200000, 3000000])
+    df = pd.DataFrame({
+        "symbol_realtime": ["High", "Medium", "High", "Low", "High"],
+        "symbol_access_count": 0,
+    })
+    apply_access_counts(df, hits)
+    assert df["symbol_access_count"].between(0, 100).all(), "存取次數應在 0–100 之間"
+    assert df["symbol_access_count"].is_monotonic_increasing, "應保持命中次數的順序"
+    assert rule_realtime_access_mismatch(df).tolist() == [True, False, False, True, False]
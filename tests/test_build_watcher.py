@@ -0,0 +1,166 @@
+"""
+Build Watcher Test Module
+
+此測試模組用於確保 CI 監看資料夾的匯入功能正確，測試項目包括：
+- 新檔案匯入後建置目錄與彙總檔的內容
+- 已匯入的檔案不會重複處理
+- 新增檔案時只處理新檔案
+- 尚未寫完的檔案會延後匯入
+- 匯入失敗的檔案在修改後才重試
+- 中斷的匯入重新執行時不會產生重複彙總
+- 正常匯入不會重新讀取歷史彙總
+- 輪詢期間消失的檔案與輪詢例外不會中止監看
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_watcher import find_new_files, latest_build, load_catalog, poll_once, watch_folder
+import build_watcher
+import threading
+from data_generation import generate_symbol_data
+import pandas as pd
+import pytest
+
+@pytest.fixture
+def watch_env(tmp_path):
+    """
+    建立監看資料夾與建置目錄、彙總檔路徑。
+    """
+    watch_dir = tmp_path / "incoming"
+    watch_dir.mkdir()
+    return {
+        "watch_dir": str(watch_dir),
+        "catalog_path": str(tmp_path / "build_catalog.csv"),
+        "rollup_path": str(tmp_path / "build_rollups.csv"),
+    }
+
+def drop_build(watch_env, name, num_symbols=50):
+    """
+    模擬 CI 在監看資料夾中放入一個建置檔案。
+    """
+    path = os.path.join(watch_env["watch_dir"], f"{name}.csv")
+    return generate_symbol_data(num_symbols=num_symbols, outfile=path)
+
+def test_ingest_new_builds(watch_env):
+    """
+    測試新檔案匯入後，建置目錄與彙總檔內容正確。
+    """
+    df = drop_build(watch_env, "nightly_001")
+    ingested = poll_once(min_age=0, **watch_env)
+    assert [entry["build_id"] for entry in ingested] == ["nightly_001"]
+
+    catalog = load_catalog(watch_env["catalog_path"])
+    assert len(catalog) == 1, "建置目錄應有 1 筆資料"
+    assert catalog.loc[0, "symbol_count"] == len(df)
+    assert catalog.loc[0, "total_size"] == df["symbol_size"].sum()
+
+    rollups = pd.read_csv(watch_env["rollup_path"])
+    assert rollups["symbol_count"].sum() == len(df), "彙總筆數應等於符號數量"
+    assert rollups["total_size"].sum() == df["symbol_size"].sum(), "彙總大小應等於符號大小總和"
+
+def test_only_new_files_are_processed(watch_env):
+    """
+    測試已匯入的檔案不會重複處理，新增檔案時只處理新檔案。
+    """
+    drop_build(watch_env, "nightly_001")
+    poll_once(min_age=0, **watch_env)
+    assert poll_once(min_age=0, **watch_env) == [], "沒有新檔案時不應匯入任何建置"
+
+    drop_build(watch_env, "merge_002", num_symbols=30)
+    ingested = poll_once(min_age=0, **watch_env)
+    assert [entry["build_id"] for entry in ingested] == ["merge_002"]
+
+    rollups = pd.read_csv(watch_env["rollup_path"])
+    assert rollups.groupby("build_id")["symbol_count"].sum().to_dict() == {"nightly_001": 50, "merge_002": 30}
+    assert latest_build(watch_env["catalog_path"])["build_id"] == "merge_002"
+
+def test_recent_files_are_deferred(watch_env):
+    """
+    測試剛修改的檔案會等到超過 min_age 才匯入。
+    """
+    drop_build(watch_env, "nightly_001")
+    assert find_new_files(watch_env["watch_dir"], watch_env["catalog_path"], min_age=3600) == []
+    assert len(find_new_files(watch_env["watch_dir"], watch_env["catalog_path"], min_age=0)) == 1
+
+def test_failed_files_retry_only_after_change(watch_env, caplog):
+    """
+    測試匯入失敗的檔案不會每次輪詢都重試，檔案修改後才重新匯入。
+    """
+    path = os.path.join(watch_env["watch_dir"], "broken_003.csv")
+    with open(path, "w") as f:
+        f.write("not,a,symbol,file\n1,2,3,4\n")
+    assert poll_once(min_age=0, **watch_env) == []
+    assert poll_once(min_age=0, **watch_env) == []
+    assert sum("broken_003" in record.message for record in caplog.records) == 1, "失敗只應記錄一次"
+
+    generate_symbol_data(num_symbols=20, outfile=path)
+    os.utime(path, (os.path.getmtime(path) - 10,) * 2)
+    assert [entry["build_id"] for entry in poll_once(min_age=0, **watch_env)] == ["broken_003"]
+
+def test_interrupted_ingest_is_not_duplicated(watch_env, monkeypatch):
+    """
+    測試寫入彙總後、寫入目錄前中斷時，重新匯入不會產生重複的彙總。
+    """
+    drop_build(watch_env, "nightly_001")
+    original_to_csv = pd.DataFrame.to_csv
+
+    def crash_on_catalog(self, path=None, *args, **kwargs):
+        if path == watch_env["catalog_path"]:
+            raise OSError("simulated crash")
+        return original_to_csv(self, path, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", crash_on_catalog)
+    assert poll_once(min_age=0, **watch_env) == []
+    monkeypatch.setattr(pd.DataFrame, "to_csv", original_to_csv)
+
+    # 模擬重新啟動後，失敗紀錄不再存在
+    monkeypatch.setattr("build_watcher._failed_files", {})
+    assert [entry["build_id"] for entry in poll_once(min_age=0, **watch_env)] == ["nightly_001"]
+    rollups = pd.read_csv(watch_env["rollup_path"])
+    assert rollups["symbol_count"].sum() == 50, "彙總不應重複"
+
+def test_normal_ingest_does_not_rescan_rollups(watch_env, monkeypatch):
+    """
+    測試沒有中斷的匯入不會讀取既有彙總檔，且完成後不留下未完成標記。
+    """
+    drop_build(watch_env, "nightly_001")
+    poll_once(min_age=0, **watch_env)
+
+    def fail_drop(*args, **kwargs):
+        raise AssertionError("正常匯入不應重新讀取彙總檔")
+
+    monkeypatch.setattr(build_watcher, "_drop_rollup_rows", fail_drop)
+    drop_build(watch_env, "nightly_002")
+    assert [entry["build_id"] for entry in poll_once(min_age=0, **watch_env)] == ["nightly_002"]
+    assert not [name for name in os.listdir(os.path.dirname(watch_env["rollup_path"]))
+                if name.endswith(".pending")], "不應留下未完成標記"
+
+def test_vanished_file_and_poll_errors(watch_env, monkeypatch):
+    """
+    測試輪詢期間消失的檔案被略過，且單次輪詢例外不會結束監看迴圈。
+    """
+    missing = os.path.join(watch_env["watch_dir"], "renamed.csv")
+    monkeypatch.setattr(build_watcher, "find_new_files", lambda *args, **kwargs: [missing])
+    assert poll_once(min_age=0, **watch_env) == []
+
+    calls = []
+    stop_event = threading.Event()
+
+    def flaky_poll(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("catalog corrupted")
+        stop_event.set()
+        return []
+
+    monkeypatch.setattr(build_watcher, "poll_once", flaky_poll)
+    watch_folder(watch_env["watch_dir"], interval=0, stop_event=stop_event,
+                 catalog_path=watch_env["catalog_path"], rollup_path=watch_env["rollup_path"])
+    assert len(calls) == 2, "輪詢失敗後應繼續下一次輪詢"
@@ -106,3 +106,86 @@ def test_output_section_values():
     valid_output_sections = ["code", "data", "init", "always_power_on", "ro_after_write"]
     assert df["symbol_output_section"].isin(valid_output_sections).all(), \
         "symbol_output_section 包含非法值"
+
+def test_seed_reproducibility():
+    """
+    測試相同亂數種子產生完全相同的資料，不同種子產生不同資料。
+    """
+    first = generate_symbol_data(num_symbols=500, outfile=None, seed=123)
+    second = generate_symbol_data(num_symbols=500, outfile=None, seed=123)
+    other = generate_symbol_data(num_symbols=500, outfile=None, seed=124)
+    assert first.equals(second), "相同種子應產生相同資料"
+    assert not first.equals(other), "不同種子應產生不同資料"
+
+def test_symbol_names_unique_with_top_up():
+    """
+    測試需要以小型符號補足時，符號名稱仍不重複。
+    
+    步驟:
+    1. 以很小的區域容量產生資料，強制觸發補足流程
+    2. 確認資料筆數與名稱唯一性
+    """
+    region_map = {
+        "ilm": {"capacity": 8 * 1024, "weight": 10},
+        "ext_memory1": {"capacity": 64 * 1024, "weight": 2},
+    }
+    df = generate_symbol_data(num_symbols=300, outfile=None, seed=1, region_map=region_map)
+    assert len(df) == 300, "資料筆數應為 300"
+    assert df["symbol_name"].is_unique, "符號名稱不應重複"
+    assert df["symbol_name"].str.startswith("small_symbol_").any(), "應觸發小型符號補足"
+
+def test_region_capacity_and_addresses():
+    """
+    測試自訂區域容量不會超出，且各區域內的位址連續不重疊。
+    """
+    region_map = {
+        "ilm": {"capacity": 16 * 1024, "weight": 5},
+        "sysram": {"capacity": 128 * 1024, "weight": 5},
+    }
+    df = generate_symbol_data(num_symbols=200, outfile=None, seed=2, region_map=region_map)
+    assert set(df["symbol_physical_memory"]) <= set(region_map), "區域應只來自自訂配置"
+    for memory, group in df.groupby("symbol_physical_memory"):
+        assert group["symbol_size"].sum() <= region_map[memory]["capacity"], f"{memory} 超出容量"
+        start = group["symbol_address"].map(lambda a: int(a, 16)).sort_values()
+        end = start + group.loc[start.index, "symbol_size"]
+        assert (start.iloc[1:].to_numpy() >= end.iloc[:-1].to_numpy()).all(), f"{memory} 位址重疊"
+
+def test_insufficient_capacity_raises():
+    """
+    測試容量不足以放入指定數量的符號時拋出 ValueError。
+    """
+    region_map = {"ilm": {"capacity": 1024, "weight": 1}}
+    with pytest.raises(ValueError):
+        generate_symbol_data(num_symbols=1000, outfile=None, seed=0, region_map=region_map)
+
+def test_preset_scale_and_distributions():
+    """
+    測試 10k 預設組合的規模、Zipf 大小分布與即時性需求相關性。
+    """
+    df = generate_symbol_data(outfile=None, seed=0, preset="10k")
+    assert len(df) == 10000, "資料筆數應為 10,000"
+    assert df["symbol_module"].nunique() > 50, "應有數十個以上的模組"
+    assert df["symbol_filename"].nunique() > 500, "應有數百個以上的檔案"
+    assert df["symbol_size"].median() < df["symbol_size"].mean(), "Zipf 分布應為右偏"
+    high_access = df.loc[df["symbol_realtime"] == "High", "symbol_access_count"].mean()
+    low_access = df.loc[df["symbol_realtime"] == "Low", "symbol_access_count"].mean()
+    assert high_access > low_access, "High 即時性符號的存取次數應較高"
+
+def test_preset_rarely_tops_up():
+    """
+    測試預設組合的區域容量足以放入 Zipf 大小的符號，很少需要以小型符號補足，且大小具有長尾。
+    """
+    df = generate_symbol_data(outfile=None, seed=0, preset="10k")
+    top_up_share = df["symbol_name"].str.startswith("small_symbol_").mean()
+    assert top_up_share < 0.01, f"補足符號比例過高: {top_up_share:.1%}"
+    assert df["symbol_size"].max() > 16 * 1024, "Zipf 分布應有大型符號的長尾"
+    assert (df["symbol_size"] % 16 != 0).any(), "符號大小不應只有 16 的倍數"
+
+def test_file_belongs_to_single_module():
+    """
+    測試每個來源檔案只屬於一個模組與一個資料夾。
+    """
+    df = generate_symbol_data(num_symbols=1000, outfile=None, seed=3)
+    assert (df.groupby("symbol_filename")["symbol_module"].nunique() == 1).all(), "檔案應只屬於一個模組"
+    assert (df.groupby("symbol_filename")["symbol_folder_name_for_file"].nunique() == 1).all(), \
+        "檔案應只屬於一個資料夾"
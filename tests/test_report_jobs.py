@@ -0,0 +1,165 @@
+"""
+Report Jobs Test Module
+
+此測試模組用於確保背景報告產生與快取功能正確，測試項目包括：
+- 報告包含完整違規清單（不截斷）與模組統計
+- 模組統計以資料列而非符號名稱去除重複
+- 快取鍵對篩選條件順序不敏感，對資料集與篩選內容敏感
+- 規則邏輯或報告版本改變時快取鍵隨之改變
+- 背景產生、重複要求沿用結果與磁碟快取讀回
+- 違規資料可延後到背景執行緒才取出，已快取時不取出
+- 產生失敗時保留錯誤狀態，磁碟快取數量有上限
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import add_symbol_cost, detect_violations
+from data_generation import generate_symbol_data
+from report_jobs import ReportJobs, build_reports, dataset_fingerprint, module_summary, report_cache_key
+import report_jobs
+import pandas as pd
+import io
+import pytest
+
+@pytest.fixture(scope="module")
+def violations():
+    """
+    產生固定亂數種子的資料並執行異常檢測。
+    """
+    df = add_symbol_cost(generate_symbol_data(num_symbols=500, outfile=None, seed=5))
+    return detect_violations(df)
+
+def test_reports_are_complete(violations):
+    """
+    測試 Markdown、HTML 與 CSV 報告包含所有違規符號。
+    """
+    reports = build_reports(violations, {"symbol_realtime": ["High", "Low"]})
+    markdown = reports["markdown"].decode("utf-8")
+    page = reports["html"].decode("utf-8")
+    assert "(略)" not in markdown, "報告不應截斷"
+    assert "模組違規統計" in markdown and "模組違規統計" in page, "應包含模組統計"
+    assert page.startswith("<!DOCTYPE html>") and "<style>" in page, "HTML 應為自含式文件"
+    for title, df_ in violations:
+        for name in df_["symbol_name"]:
+            assert name in markdown, f"Markdown 缺少 {name}"
+            assert f"<td>{name}</td>" in page, f"HTML 缺少 {name}"
+
+    all_rows = pd.read_csv(io.BytesIO(reports["csv"]), encoding="utf-8-sig")
+    assert len(all_rows) == sum(len(df_) for _, df_ in violations), "CSV 應包含所有違規"
+    assert set(all_rows["violation_rule"]) == {title for title, _ in violations}
+
+def test_module_summary_with_duplicate_names():
+    """
+    測試不同資料列的符號名稱相同時（如不同檔案的 static 符號），違規大小仍全部計入；
+    同一列違反多條規則時只計算一次。
+    """
+    df = pd.DataFrame({
+        "symbol_name": ["helper", "helper", "init"],
+        "symbol_module": ["module_1", "module_1", "module_2"],
+        "symbol_size": [100, 200, 50],
+    })
+    violations = [("rule_a", df.iloc[[0, 1]]), ("rule_b", df.iloc[[1, 2]])]
+    summary = module_summary(violations)
+    assert summary.loc["module_1", "違規符號總大小(bytes)"] == 300, "同名符號應分別計入"
+    assert summary.loc["module_2", "違規符號總大小(bytes)"] == 50
+    assert summary.loc["module_1", "違規總數"] == 3
+
+def test_cache_key(tmp_path):
+    """
+    測試快取鍵的正規化與區分能力。
+    """
+    data = tmp_path / "symbols.csv"
+    data.write_text("a,b\n1,2\n")
+    digest = dataset_fingerprint(str(data))
+    key = report_cache_key(digest, {"symbol_module": ["module_2", "module_1"], "symbol_realtime": []})
+    assert key == report_cache_key(digest, {"symbol_module": ["module_1", "module_2"]}), "順序與空條件不應影響快取鍵"
+    assert key != report_cache_key(digest, {"symbol_module": ["module_1"]}), "不同篩選條件應有不同快取鍵"
+    data.write_text("a,b\n1,3\n")
+    assert key != report_cache_key(dataset_fingerprint(str(data)), {"symbol_module": ["module_1", "module_2"]}), \
+        "不同資料集應有不同快取鍵"
+
+def test_cache_key_tracks_rule_logic(monkeypatch):
+    """
+    測試規則標題與函式名稱相同但邏輯不同、或報告版本改變時，快取鍵不同。
+    """
+    key = report_cache_key("digest", {})
+    assert key == report_cache_key("digest", {}), "相同規則集應有相同快取鍵"
+
+    title, rule, message = report_jobs.VIOLATION_RULES[3]
+
+    def rule_realtime_access_mismatch(df):
+        return rule(df) & (df["symbol_size"] > 0)
+
+    rules = list(report_jobs.VIOLATION_RULES)
+    rules[3] = (title, rule_realtime_access_mismatch, message)
+    monkeypatch.setattr(report_jobs, "VIOLATION_RULES", rules)
+    assert report_cache_key("digest", {}) != key, "規則邏輯改變時快取鍵應改變"
+
+    monkeypatch.undo()
+    monkeypatch.setattr(report_jobs, "REPORT_VERSION", report_jobs.REPORT_VERSION + 1)
+    assert report_cache_key("digest", {}) != key, "報告版本改變時快取鍵應改變"
+
+def test_background_jobs_and_disk_cache(violations, tmp_path):
+    """
+    測試背景產生報告、重複要求沿用結果，以及重新建立後從磁碟讀回。
+    """
+    jobs = ReportJobs(report_dir=str(tmp_path))
+    first = jobs.request("key", violations)
+    reports = jobs.wait("key", timeout=60)
+    assert reports is not None and not jobs.is_pending("key")
+    assert first is None or first is reports
+    assert jobs.request("key", []) is reports, "已完成的報告應直接沿用"
+
+    reloaded = ReportJobs(report_dir=str(tmp_path))
+    assert reloaded.get("key") == reports, "應從磁碟快取讀回報告"
+    assert reloaded.get("missing") is None
+
+def test_lazy_violations(violations, tmp_path):
+    """
+    測試以函式傳入違規資料時，只在需要產生報告時才呼叫。
+    """
+    calls = []
+
+    def load_violations():
+        calls.append(1)
+        return violations
+
+    jobs = ReportJobs(report_dir=str(tmp_path))
+    jobs.request("key", load_violations)
+    assert jobs.wait("key", timeout=60) == build_reports(violations)
+    jobs.request("key", load_violations)
+    assert len(calls) == 1, "已快取的報告不應再取出違規資料"
+
+def test_failed_job_is_reported(violations, tmp_path, monkeypatch):
+    """
+    測試報告產生失敗時記錄錯誤狀態，且不會被重複送出。
+    """
+    def broken_build(*args, **kwargs):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(report_jobs, "build_reports", broken_build)
+    jobs = ReportJobs(report_dir=str(tmp_path))
+    jobs.request("key", violations)
+    assert jobs.wait("key", timeout=60) is None
+    assert not jobs.is_pending("key")
+    assert jobs.error("key") == "render failed", "應保留失敗原因"
+    assert jobs.request("key", violations) is None and not jobs.is_pending("key"), "失敗的報告不應自動重試"
+
+def test_disk_cache_is_bounded(violations, tmp_path):
+    """
+    測試磁碟快取超過上限時刪除最久未使用的報告。
+    """
+    jobs = ReportJobs(report_dir=str(tmp_path), max_cached=2)
+    for age, key in enumerate(["first", "second", "third"], start=1):
+        jobs.request(key, violations[:1])
+        jobs.wait(key, timeout=60)
+        # 確保各報告目錄的最近使用時間依序遞增
+        os.utime(tmp_path / key, (age, age))
+    assert sorted(os.listdir(tmp_path)) == ["second", "third"], "應刪除最舊的報告"
@@ -0,0 +1,110 @@
+"""
+Stratified Sampling Test Module
+
+此測試模組用於確保快速預覽的分層抽樣與估計功能正確，測試項目包括：
+- 每層樣本數與分層資訊欄位
+- 層數很多時樣本大小仍不超過目標值
+- 完整抽樣時估計值等於精確值
+- 抽樣估計的信賴區間涵蓋精確值
+- 違規筆數估計
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import add_symbol_cost, apply_filters, detect_violations
+from sampling import build_stratified_sample, estimate_total, estimate_violation_counts
+import numpy as np
+import pandas as pd
+import pytest
+
+@pytest.fixture(scope="module")
+def symbol_df():
+    """
+    產生 100,000 筆固定亂數種子的符號資料。
+    """
+    rng = np.random.default_rng(42)
+    n = 100000
+    df = pd.DataFrame({
+        "symbol_name": [f"symbol_{i}" for i in range(n)],
+        "symbol_module": rng.choice([f"module_{i}" for i in range(20)], n),
+        "symbol_folder_name_for_file": rng.choice(["core/mlm", "base/hal", "customer"], n),
+        "symbol_physical_memory": rng.choice(["ilm", "dlm", "sysram", "ext_memory1", "ext_memory2"], n),
+        "symbol_size": rng.integers(16, 2048, n),
+        "symbol_realtime": rng.choice(["High", "Medium", "Low"], n, p=[0.2, 0.3, 0.5]),
+        "symbol_access_count": rng.integers(0, 101, n),
+        "symbol_hw_usage": rng.choice(["Yes", "No"], n),
+    })
+    return add_symbol_cost(df)
+
+def test_sample_size_and_strata(symbol_df):
+    """
+    測試樣本大小接近目標值，且每層樣本數不超過母體筆數。
+    """
+    sample = build_stratified_sample(symbol_df, sample_size=5000)
+    assert 5000 <= len(sample) <= 6000, "樣本大小應接近目標值"
+    per_stratum = sample.groupby("_stratum").agg(
+        n=("_stratum_sample", "first"), N=("_stratum_size", "first"), rows=("symbol_name", "count")
+    )
+    assert (per_stratum["rows"] == per_stratum["n"]).all(), "各層樣本數應等於 _stratum_sample"
+    assert (per_stratum["n"] <= per_stratum["N"]).all(), "各層樣本數不應超過母體筆數"
+    assert per_stratum["N"].sum() == len(symbol_df), "各層母體筆數總和應等於資料筆數"
+
+def test_sample_size_with_many_strata(symbol_df):
+    """
+    測試層數乘上每層最少筆數超過目標值時，樣本大小仍不超過目標值，且估計值涵蓋精確值。
+    """
+    strata = ["symbol_physical_memory", "symbol_module", "symbol_folder_name_for_file", "symbol_realtime"]
+    sample = build_stratified_sample(symbol_df, strata=strata, sample_size=2000)
+    assert len(sample) <= 2000, "樣本大小不應超過目標值"
+    assert sample["_stratum_size"].groupby(sample["_stratum"]).first().sum() == len(symbol_df), \
+        "合併後各層母體筆數總和應等於資料筆數"
+    estimate = estimate_total(sample, "symbol_cost", confidence=0.99).iloc[0]
+    assert estimate["lower"] <= symbol_df["symbol_cost"].sum() <= estimate["upper"], "信賴區間應涵蓋精確值"
+
+def test_sample_is_reproducible(symbol_df):
+    """
+    測試相同種子產生相同樣本。
+    """
+    first = build_stratified_sample(symbol_df, sample_size=2000, seed=7)
+    second = build_stratified_sample(symbol_df, sample_size=2000, seed=7)
+    assert first.index.equals(second.index), "相同種子應產生相同樣本"
+
+def test_full_sample_is_exact(symbol_df):
+    """
+    測試資料筆數不超過樣本大小時，估計值即為精確值且區間寬度為 0。
+    """
+    small = symbol_df.head(1000)
+    sample = build_stratified_sample(small, sample_size=5000)
+    estimate = estimate_total(sample, "symbol_cost", by="symbol_module")
+    exact = small.groupby("symbol_module")["symbol_cost"].sum()
+    assert np.allclose(estimate["estimate"].reindex(exact.index), exact), "完整抽樣時估計值應等於精確值"
+    assert np.allclose(estimate["stderr"], 0), "完整抽樣時標準誤應為 0"
+
+def test_confidence_interval_covers_exact(symbol_df):
+    """
+    測試篩選後的分組成本估計，其 99% 信賴區間涵蓋精確值。
+    """
+    sample = build_stratified_sample(symbol_df, sample_size=10000)
+    spec = {"symbol_realtime": ["High", "Medium"]}
+    estimate = estimate_total(apply_filters(sample, spec), "symbol_cost",
+                              by="symbol_physical_memory", confidence=0.99)
+    exact = apply_filters(symbol_df, spec).groupby("symbol_physical_memory")["symbol_cost"].sum()
+    estimate = estimate.reindex(exact.index)
+    assert ((estimate["lower"] <= exact) & (exact <= estimate["upper"])).all(), "信賴區間應涵蓋精確值"
+
+def test_violation_count_estimates(symbol_df):
+    """
+    測試違規筆數估計的信賴區間涵蓋精確筆數。
+    """
+    sample = build_stratified_sample(symbol_df, sample_size=10000)
+    estimate = estimate_violation_counts(sample, confidence=0.99)
+    for title, df_ in detect_violations(symbol_df):
+        row = estimate.loc[title]
+        assert row["lower"] <= len(df_) <= row["upper"], f"{title} 的信賴區間應涵蓋精確筆數"
@@ -0,0 +1,154 @@
+"""
+Sharded Execution Test Module
+
+此測試模組用於確保多程序分片計算的結果與 pandas 單程序計算一致，測試項目包括：
+- 單一與多個分組欄位的加總
+- 篩選後的異常檢測結果
+- 資料量小時改在目前程序中計算
+- 篩選筆數與篩選後資料
+- 多個資料表共用同一個程序池，計算中關閉資料表時延後釋放
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sharded
+from analyzer import add_symbol_cost, apply_filters, detect_violations
+from data_generation import generate_symbol_data
+from sharded import ShardedTable
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import threading
+
+FILTERS = {"symbol_realtime": ["High", "Low"], "symbol_physical_memory": ["ilm", "sysram", "ext_memory1"]}
+
+@pytest.fixture(scope="module")
+def symbol_df(tmp_path_factory):
+    """
+    產生 2,000 筆符號資料並計算成本。
+    """
+    outfile = str(tmp_path_factory.mktemp("data") / "symbols.csv")
+    return add_symbol_cost(generate_symbol_data(num_symbols=2000, outfile=outfile))
+
+@pytest.fixture(scope="module")
+def parallel_table(symbol_df):
+    """
+    建立強制使用 2 個工作程序的資料表。
+    """
+    table = ShardedTable(symbol_df, workers=2, min_rows=0)
+    yield table
+    table.close()
+
+@pytest.fixture(autouse=True)
+def small_shards(monkeypatch):
+    """
+    縮小分片大小，讓測試資料也會被切成多個分片。
+    """
+    monkeypatch.setattr(sharded, "MIN_SHARD_ROWS", 500)
+
+def test_parallel_table_uses_shared_memory(parallel_table):
+    """
+    測試強制多程序時會建立共享記憶體區塊與分片。
+    """
+    assert parallel_table.parallel, "應啟用多程序計算"
+    assert len(parallel_table._shards()) == 2, "應切成 2 個分片"
+
+def test_group_sum_matches_pandas(symbol_df, parallel_table):
+    """
+    測試篩選後的分組加總與 pandas groupby 結果一致。
+    """
+    result = parallel_table.group_sum("symbol_module", ("symbol_cost", "symbol_size"), FILTERS)
+    expected = apply_filters(symbol_df, FILTERS).groupby("symbol_module").agg(
+        symbol_cost=("symbol_cost", "sum"), symbol_size=("symbol_size", "sum"), symbol_count=("symbol_size", "size")
+    )
+    assert list(result.index) == list(expected.index), "分組值應一致"
+    assert np.allclose(result.to_numpy(), expected[list(result.columns)].to_numpy()), "加總結果應一致"
+
+def test_multi_key_group_sum(symbol_df, parallel_table):
+    """
+    測試多個分組欄位的加總與 pandas groupby 結果一致。
+    """
+    keys = ["symbol_module", "symbol_physical_memory"]
+    result = parallel_table.group_sum(keys)
+    expected = symbol_df.groupby(keys)["symbol_cost"].sum()
+    assert np.allclose(result["symbol_cost"].reindex(expected.index), expected), "多欄位加總結果應一致"
+    assert result["symbol_count"].sum() == len(symbol_df), "總筆數應等於資料筆數"
+
+def test_detect_violations_matches_pandas(symbol_df, parallel_table):
+    """
+    測試篩選後的異常檢測結果與單程序結果一致。
+    """
+    result = parallel_table.detect_violations(FILTERS)
+    expected = detect_violations(apply_filters(symbol_df, FILTERS))
+    assert [title for title, _ in result] == [title for title, _ in expected], "違規規則應一致"
+    for (_, got), (_, want) in zip(result, expected):
+        assert got.index.equals(want.index), "違規符號應一致"
+
+def test_small_input_runs_in_process(symbol_df):
+    """
+    測試資料量低於門檻時不建立程序池，結果仍正確。
+    """
+    table = ShardedTable(symbol_df, workers=4)
+    assert not table.parallel, "資料量小時不應啟用多程序"
+    expected = symbol_df.groupby("symbol_physical_memory")["symbol_cost"].sum()
+    result = table.group_sum("symbol_physical_memory")["symbol_cost"]
+    assert np.allclose(result.reindex(expected.index), expected)
+    table.close()
+
+def test_count_and_filtered_frame(symbol_df, parallel_table):
+    """
+    測試篩選筆數與篩選後資料與 apply_filters 一致，沒有篩選條件時不複製資料。
+    """
+    expected = apply_filters(symbol_df, FILTERS)
+    assert parallel_table.count(FILTERS) == len(expected)
+    assert parallel_table.filtered_frame(FILTERS).index.equals(expected.index)
+    assert parallel_table.count({}) == len(symbol_df)
+    assert parallel_table.filtered_frame({"symbol_module": []}) is symbol_df, "沒有篩選條件時應直接回傳原始資料"
+
+def test_tables_share_one_pool(symbol_df, parallel_table):
+    """
+    測試多個資料表共用程序池，關閉其中一個不影響其他資料表。
+    """
+    other = ShardedTable(symbol_df, workers=2, min_rows=0)
+    expected = parallel_table.group_sum("symbol_module")
+    assert sharded._shared_executor() is sharded._executor, "應只有一個共用程序池"
+    other.close()
+    assert parallel_table.group_sum("symbol_module").equals(expected), "關閉其他資料表後仍應可計算"
+    with pytest.raises(RuntimeError):
+        other.count(FILTERS)
+
+def test_close_waits_for_running_tasks(symbol_df, monkeypatch):
+    """
+    測試計算進行中呼叫 close() 時，共享記憶體延後到計算結束才釋放。
+    """
+    table = ShardedTable(symbol_df, workers=2, min_rows=0)
+    started, proceed = threading.Event(), threading.Event()
+    run_shard = sharded._run_shard
+
+    def blocking_run_shard(*args):
+        started.set()
+        proceed.wait(5)
+        return run_shard(*args)
+
+    # 以執行緒池取代程序池，才能在計算途中暫停
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(sharded, "_shared_executor", lambda: pool)
+    monkeypatch.setattr(sharded, "_run_shard", blocking_run_shard)
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault("count", table.count(FILTERS)))
+    worker.start()
+    assert started.wait(5)
+    table.close()
+    assert table._finalizer.alive, "計算進行中不應釋放共享記憶體"
+    proceed.set()
+    worker.join(5)
+    pool.shutdown()
+    assert result["count"] == len(apply_filters(symbol_df, FILTERS))
+    assert not table._finalizer.alive, "計算結束後應釋放共享記憶體"
@@ -0,0 +1,153 @@
+"""
+Workspace Test Module
+
+此測試模組用於確保多映像工作區的載入與彙總正確，測試項目包括：
+- 載入結果與各映像 CSV 內容一致，字串欄位為共用類別
+- 各映像的列範圍
+- 加入映像維度的分組加總與篩選
+- 共用與私有記憶體區域的使用率
+- regions.csv 的 shared 欄位解析
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import sys
+import os
+
+# 將專案根目錄加入 Python 路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import add_symbol_cost, apply_filters
+from data_generation import generate_symbol_data
+from report_jobs import dataset_fingerprint
+from sharded import ShardedTable
+from workspace import (IMAGE_COLUMN, discover_images, image_partitions, load_region_config,
+                       load_workspace, region_utilization)
+import numpy as np
+import pandas as pd
+import pytest
+
+IMAGE_SIZES = {"app": 300, "dsp": 200, "rom_patch": 100}
+
+@pytest.fixture
+def image_dir(tmp_path):
+    """
+    產生三個不同亂數種子的映像 CSV。
+    """
+    for seed, (name, num_symbols) in enumerate(IMAGE_SIZES.items()):
+        generate_symbol_data(num_symbols=num_symbols, outfile=str(tmp_path / f"{name}.csv"), seed=seed)
+    return tmp_path
+
+@pytest.fixture
+def reference(image_dir):
+    """
+    以 pd.concat 串接各映像作為比對基準。
+    """
+    return pd.concat(
+        [pd.read_csv(path).assign(symbol_image=name) for name, path in discover_images(str(image_dir)).items()],
+        ignore_index=True
+    )
+
+def test_load_matches_images(image_dir, reference):
+    """
+    測試工作區內容與各映像 CSV 一致，且字串欄位為共用類別。
+    """
+    (image_dir / "regions.csv").write_text("symbol_physical_memory,capacity\nsysram,1024\n")
+    images = discover_images(str(image_dir))
+    assert list(images) == sorted(IMAGE_SIZES), "regions.csv 不應視為映像"
+
+    df = load_workspace(images)
+    assert list(df.columns) == list(reference.columns)
+    for column in reference.columns:
+        assert (df[column].astype(object).to_numpy() == reference[column].astype(object).to_numpy()).all(), \
+            f"{column} 內容應一致"
+    assert isinstance(df["symbol_module"].dtype, pd.CategoricalDtype), "字串欄位應為類別型別"
+    assert isinstance(df[IMAGE_COLUMN].dtype, pd.CategoricalDtype), "映像欄位應為類別型別"
+
+    partitions = image_partitions(df)
+    assert partitions == {"app": (0, 300), "dsp": (300, 500), "rom_patch": (500, 600)}, "各映像應為連續分區"
+
+def test_group_sum_by_image(image_dir, reference):
+    """
+    測試加入映像維度的分組加總與篩選結果與 pandas 一致。
+    """
+    df = add_symbol_cost(load_workspace(discover_images(str(image_dir))))
+    reference = add_symbol_cost(reference)
+    filters = {"symbol_image": ["dsp", "rom_patch"], "symbol_realtime": ["High"]}
+
+    table = ShardedTable(df)
+    keys = [IMAGE_COLUMN, "symbol_physical_memory"]
+    result = table.group_sum(keys, ("symbol_size",), filters)
+    expected = apply_filters(reference, filters).groupby(keys)["symbol_size"].sum()
+    assert set(result.index.get_level_values(IMAGE_COLUMN)) == {"dsp", "rom_patch"}, "應只包含篩選的映像"
+    assert np.allclose(result["symbol_size"].reindex(expected.index), expected), "分組加總結果應一致"
+    table.close()
+
+def test_region_utilization(image_dir):
+    """
+    測試共用區域合計所有映像的用量，私有區域各映像分別計算。
+    """
+    df = load_workspace(discover_images(str(image_dir)))
+    usage = df.groupby([IMAGE_COLUMN, "symbol_physical_memory"], observed=True)["symbol_size"].sum()
+    config = load_region_config(str(image_dir))
+    utilization = region_utilization(usage, config).set_index([IMAGE_COLUMN, "symbol_physical_memory"])
+
+    sysram_total = df.loc[df["symbol_physical_memory"] == "sysram", "symbol_size"].sum()
+    assert config.loc["sysram", "shared"] and not config.loc["ilm", "shared"]
+    assert np.isclose(utilization.loc[("dsp", "sysram"), "utilization"],
+                      sysram_total / config.loc["sysram", "capacity"]), "共用區域應以所有映像合計"
+    assert np.isclose(utilization.loc[("dsp", "ilm"), "utilization"],
+                      usage[("dsp", "ilm")] / config.loc["ilm", "capacity"]), "私有區域應各映像分別計算"
+
+    (image_dir / "regions.csv").write_text("symbol_physical_memory,capacity,shared\nilm,131072,True\n")
+    config = load_region_config(str(image_dir))
+    assert config.loc["ilm", "capacity"] == 131072 and config.loc["ilm", "shared"], "應使用 regions.csv 的設定"
+
+def test_region_config_shared_values(image_dir):
+    """
+    測試 regions.csv 的 shared 欄位依文字解析，空白時依預設共用區域，無法辨識時拋出 ValueError。
+    """
+    (image_dir / "regions.csv").write_text(
+        "symbol_physical_memory,capacity,shared\nilm,1024,no\nsysram,2048,\next_memory1,4096,FALSE\ndlm,1024,Yes\n"
+    )
+    shared = load_region_config(str(image_dir))["shared"]
+    assert shared.to_dict() == {"ilm": False, "sysram": True, "ext_memory1": False, "dlm": True}
+
+    (image_dir / "regions.csv").write_text("symbol_physical_memory,capacity\nilm,1024\nsysram,2048\n")
+    assert load_region_config(str(image_dir))["shared"].to_dict() == {"ilm": False, "sysram": True}
+
+    (image_dir / "regions.csv").write_text("symbol_physical_memory,capacity,shared\nilm,1024,maybe\n")
+    with pytest.raises(ValueError, match="maybe"):
+        load_region_config(str(image_dir))
+
+def test_workspace_fingerprint(image_dir):
+    """
+    測試工作區任一映像變更時資料集雜湊值隨之改變。
+    """
+    digest = dataset_fingerprint(str(image_dir))
+    assert digest == dataset_fingerprint(str(image_dir))
+    generate_symbol_data(num_symbols=100, outfile=str(image_dir / "rom_patch.csv"), seed=42)
+    assert digest != dataset_fingerprint(str(image_dir)), "映像變更後雜湊值應改變"
+
+def test_mismatched_columns(image_dir):
+    """
+    測試映像欄位不一致時以缺值補齊，缺少必要欄位或型別錯誤時指出是哪個映像。
+    """
+    patch = pd.read_csv(image_dir / "rom_patch.csv").drop(columns=["symbol_access_count", "symbol_hw_usage"])
+    patch.to_csv(image_dir / "rom_patch.csv", index=False)
+    df = load_workspace(discover_images(str(image_dir)))
+    start, stop = image_partitions(df)["rom_patch"]
+    assert len(df) == 600, "筆數應為各映像總和"
+    assert df["symbol_access_count"].iloc[start:stop].isna().all(), "缺少的數值欄位應為缺值"
+    assert df["symbol_access_count"].iloc[:start].notna().all()
+    assert df["symbol_hw_usage"].iloc[start:stop].isna().all(), "缺少的類別欄位應為缺值"
+    assert isinstance(df["symbol_hw_usage"].dtype, pd.CategoricalDtype)
+
+    patch.assign(symbol_size="big").to_csv(image_dir / "rom_patch.csv", index=False)
+    with pytest.raises(ValueError, match="rom_patch"):
+        load_workspace(discover_images(str(image_dir)))
+
+    patch.drop(columns=["symbol_physical_memory"]).to_csv(image_dir / "rom_patch.csv", index=False)
+    with pytest.raises(ValueError, match="rom_patch.*symbol_physical_memory"):
+        load_workspace(discover_images(str(image_dir)))
@@ -0,0 +1,278 @@
+"""
+Workspace Module
+
+此模組將同一顆 SoC 上多個映像（應用核心、DSP、Boot ROM patch 等）的符號資料
+載入為同一張欄式資料表，主要功能包括：
+- 各映像為資料表中連續的分區，以 symbol_image 類別欄位區分
+- 字串欄位以所有映像共用的類別編碼，逐一讀入映像後即釋放原始資料，不串接多份副本
+- 依記憶體區域容量計算各映像與共用區域的使用率
+
+Author: swchen.tw
+Version: 1.0.0
+"""
+
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_generation import DEFAULT_REGION_MAP
+
+# 多映像工作區資料夾（每個 CSV 為一個映像）
+WORKSPACE_DIR = "data/images"
+
+# 記憶體區域容量設定檔（放在工作區資料夾中，不視為映像）
+REGION_CONFIG = "regions.csv"
+
+# 映像欄位名稱
+IMAGE_COLUMN = "symbol_image"
+
+# 多個映像共用的記憶體區域（其餘區域為各核心私有）
+SHARED_REGIONS = ["sysram", "ext_memory1", "ext_memory2"]
+
+# 每個符號各不相同、不適合類別編碼的字串欄位
+PLAIN_COLUMNS = ["symbol_name", "symbol_address"]
+
+# 一定是數值的欄位（任一映像含有非數值資料即視為錯誤）
+NUMERIC_COLUMNS = ["symbol_size", "symbol_access_count"]
+
+# regions.csv 中 shared 欄位可接受的值（不分大小寫）
+TRUE_VALUES = ["true", "yes", "y", "1"]
+FALSE_VALUES = ["false", "no", "n", "0"]
+
+# 每個映像都必須具備的欄位
+REQUIRED_COLUMNS = ["symbol_name", "symbol_size", "symbol_physical_memory"]
+
+logger = logging.getLogger("workspace")
+
+def discover_images(directory=WORKSPACE_DIR):
+    """
+    找出工作區資料夾中的映像檔案。
+
+    Args:
+        directory (str, optional): 工作區資料夾. 預設為"data/images".
+
+    Returns:
+        dict: {映像名稱（檔名去除副檔名）: CSV 路徑}，依名稱排序
+    """
+    if not os.path.isdir(directory):
+        return {}
+    return {
+        os.path.splitext(name)[0]: os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".csv") and name != REGION_CONFIG
+    }
+
+def workspace_mtime(path):
+    """
+    取得資料來源的修改時間，作為快取鍵。
+
+    Args:
+        path (str): 符號資料 CSV 或工作區資料夾路徑
+
+    Returns:
+        float: 檔案修改時間；資料夾為資料夾本身與其中映像檔案的最新修改時間
+    """
+    if not os.path.isdir(path):
+        return os.path.getmtime(path)
+    return max([os.path.getmtime(path)] + [os.path.getmtime(p) for p in discover_images(path).values()])
+
+def _workspace_schema(images):
+    """
+    由所有映像的欄位決定工作區的欄位與型別。
+
+    Args:
+        images (dict): {映像名稱: CSV 路徑}
+
+    Returns:
+        dict: {欄位: "category" | "str" | "numeric"}，依欄位首次出現的順序排列
+
+    Raises:
+        ValueError: 映像缺少必要欄位
+
+    備註:
+        - PLAIN_COLUMNS 為 "str"，NUMERIC_COLUMNS 為 "numeric"
+        - 其他欄位在任一映像中（以前 1000 列判斷）不是數值即為 "category"，其餘為 "numeric"
+    """
+    schema = {}
+    for name, path in images.items():
+        head = pd.read_csv(path, nrows=1000)
+        missing = [column for column in REQUIRED_COLUMNS if column not in head.columns]
+        if missing:
+            raise ValueError(f"映像 {name} 缺少必要欄位: {', '.join(missing)}")
+        for column in head.columns:
+            if column in PLAIN_COLUMNS:
+                schema[column] = "str"
+            elif column in NUMERIC_COLUMNS:
+                schema[column] = "numeric"
+            elif not pd.api.types.is_numeric_dtype(head[column]) and not head[column].isna().all():
+                schema[column] = "category"
+            else:
+                schema.setdefault(column, "numeric")
+    return schema
+
+def load_workspace(images):
+    """
+    將多個映像的符號資料載入為一張資料表。
+
+    Args:
+        images (dict): {映像名稱: CSV 路徑}
+
+    Returns:
+        pd.DataFrame: 各映像依序排列的符號資料，加入 symbol_image 欄位；
+            字串欄位（symbol_name、symbol_address 除外）為所有映像共用類別的 category 型別
+
+    備註:
+        - 一次只讀入一個映像，讀入後立即轉為類別代碼與數值陣列並釋放原始 DataFrame，
+          因此尖峰記憶體約為一個映像的原始資料加上所有映像的欄式資料
+        - 各映像的列位置為連續區段，見 image_partitions
+        - 欄位與型別由所有映像共同決定（見 _workspace_schema），映像缺少的欄位以缺值補齊
+
+    Raises:
+        ValueError: 映像缺少必要欄位，或數值欄位含有非數值資料
+    """
+    schema = _workspace_schema(images)
+    categories = {}
+    parts = {column: [] for column in schema}
+    lengths = []
+    for name, path in images.items():
+        # 字串欄位直接以類別型別讀入，避免先建立大量字串物件
+        header = pd.read_csv(path, nrows=0).columns
+        dtype = {column: "category" for column in header if schema[column] == "category"}
+        df = pd.read_csv(path, dtype=dtype)
+        n = len(df)
+        lengths.append(n)
+        for column, kind in schema.items():
+            if column not in df.columns:
+                # 此映像沒有的欄位以缺值補齊
+                if kind == "category":
+                    parts[column].append(np.full(n, -1, dtype=np.int32))
+                else:
+                    fill_dtype = "str" if kind == "str" else "float64"
+                    parts[column].append(pd.Series(np.nan, index=pd.RangeIndex(n), dtype=fill_dtype))
+                continue
+            values = df[column]
+            if kind == "numeric" and not pd.api.types.is_numeric_dtype(values):
+                raise ValueError(f"映像 {name} 的欄位 {column} 含有非數值資料")
+            if kind != "category":
+                parts[column].append(values.astype(kind) if kind == "str" else values)
+                continue
+            # 將本映像的類別併入共用類別，再把代碼轉換為共用類別的代碼
+            local = values.cat
+            known = categories.get(column, pd.Index([], dtype=local.categories.dtype))
+            known = known.append(local.categories.difference(known))
+            categories[column] = known
+            remap = known.get_indexer(local.categories).astype(np.int32)
+            codes = local.codes.to_numpy()
+            parts[column].append(np.where(codes >= 0, remap[codes], -1).astype(np.int32))
+        del df
+        logger.info(f"載入映像 {name}: {n} 筆記錄")
+
+    data = {}
+    for column, chunks in parts.items():
+        if schema[column] == "category":
+            known = categories.get(column, pd.Index([], dtype="str"))
+            codes = np.concatenate(chunks)
+            data[column] = pd.Categorical.from_codes(codes, categories=known).reorder_categories(known.sort_values())
+        else:
+            data[column] = pd.concat(chunks, ignore_index=True).array
+        chunks.clear()
+    image_codes = np.repeat(np.arange(len(images), dtype=np.int16), lengths)
+    data[IMAGE_COLUMN] = pd.Categorical.from_codes(image_codes, categories=list(images))
+    df = pd.DataFrame(data, copy=False)
+    logger.info(f"工作區共 {len(images)} 個映像、{len(df)} 筆記錄")
+    return df
+
+def image_partitions(df):
+    """
+    取得各映像在資料表中的列範圍。
+
+    Args:
+        df (pd.DataFrame): load_workspace 回傳的資料表
+
+    Returns:
+        dict: {映像名稱: (start, stop)}
+    """
+    images = df[IMAGE_COLUMN].cat.categories
+    codes = df[IMAGE_COLUMN].cat.codes.to_numpy()
+    bounds = np.searchsorted(codes, np.arange(len(images) + 1))
+    return {image: (int(bounds[i]), int(bounds[i + 1])) for i, image in enumerate(images)}
+
+def load_region_config(directory=WORKSPACE_DIR):
+    """
+    載入記憶體區域容量設定。
+
+    Args:
+        directory (str, optional): 工作區資料夾. 預設為"data/images".
+
+    Returns:
+        pd.DataFrame: 以 symbol_physical_memory 為索引，欄位為 capacity（bytes）與 shared（是否多映像共用）
+
+    Raises:
+        ValueError: regions.csv 的 shared 欄位含有無法辨識的值
+
+    備註:
+        - 工作區資料夾中有 regions.csv 時使用其內容，
+          否則使用 data_generation.DEFAULT_REGION_MAP 的容量與 SHARED_REGIONS
+        - shared 欄位接受 true/false、yes/no、y/n、1/0（不分大小寫）；空白或缺少此欄位時依 SHARED_REGIONS 判斷
+    """
+    path = os.path.join(directory, REGION_CONFIG)
+    if os.path.exists(path):
+        config = pd.read_csv(path, dtype={"shared": "str"}).set_index("symbol_physical_memory")
+        default = pd.Series(config.index.isin(SHARED_REGIONS), index=config.index)
+        config["shared"] = _parse_shared(config["shared"], default) if "shared" in config.columns else default
+        return config[["capacity", "shared"]].astype({"capacity": "int64", "shared": bool})
+    config = pd.DataFrame({
+        "capacity": {region: settings["capacity"] for region, settings in DEFAULT_REGION_MAP.items()},
+    })
+    config["shared"] = config.index.isin(SHARED_REGIONS)
+    config.index.name = "symbol_physical_memory"
+    return config
+
+def _parse_shared(values, default):
+    """
+    將 regions.csv 的 shared 欄位轉為布林值；空白的值使用 default。
+    """
+    text = values.str.strip().str.lower()
+    unknown = text.notna() & ~text.isin(TRUE_VALUES + FALSE_VALUES)
+    if unknown.any():
+        raise ValueError(f"{REGION_CONFIG} 的 shared 欄位含有無法辨識的值: {', '.join(values[unknown].unique())}")
+    return text.isin(TRUE_VALUES).where(text.notna(), default)
+
+def region_utilization(usage, config):
+    """
+    計算各映像在各記憶體區域的使用率。
+
+    Args:
+        usage (pd.Series): 以 (symbol_image, symbol_physical_memory) 為索引的使用量（bytes），
+            例如 ShardedTable.group_sum([...], ("symbol_size",))["symbol_size"]
+        config (pd.DataFrame): load_region_config 的回傳值
+
+    Returns:
+        pd.DataFrame: 每列為一個 (映像, 區域)，欄位包括：
+            - used: 此映像在此區域的使用量
+            - capacity: 區域容量（私有區域為每個映像各自的容量）
+            - shared: 是否為共用區域
+            - region_used: 共用區域為所有映像的合計使用量，私有區域等於 used
+            - utilization: region_used / capacity；設定中沒有的區域為 NaN
+    """
+    result = usage.rename("used").reset_index()
+    region = result["symbol_physical_memory"]
+    result["capacity"] = region.map(config["capacity"]).astype(float)
+    result["shared"] = region.map(config["shared"]).fillna(False).astype(bool)
+    pooled = result.groupby("symbol_physical_memory", observed=True)["used"].transform("sum")
+    result["region_used"] = result["used"].where(~result["shared"], pooled)
+    result["utilization"] = result["region_used"] / result["capacity"]
+    return result
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description="彙總多映像工作區的記憶體區域使用率")
+    parser.add_argument("directory", nargs="?", default=WORKSPACE_DIR, help="工作區資料夾")
+    args = parser.parse_args()
+
+    workspace = load_workspace(discover_images(args.directory))
+    usage = workspace.groupby([IMAGE_COLUMN, "symbol_physical_memory"], observed=True)["symbol_size"].sum()
+    print(region_utilization(usage, load_region_config(args.directory)).to_string(index=False))